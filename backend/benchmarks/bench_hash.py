@@ -0,0 +1,66 @@
+"""Logins/s por núcleo con distintos costos de scrypt.
+
+Mide la verificación directa (un núcleo), la verificación a través del pool
+de hilos de utils.security con todos los núcleos, y el caso en que la
+verificación ya está en el LRU.
+
+Desde el directorio backend:
+    python -m benchmarks.bench_hash --costos 12 13 14 15
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import security  # noqa: E402
+
+
+def por_segundo(funcion, segundos):
+    n = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < segundos:
+        funcion()
+        n += 1
+    return n / (time.perf_counter() - inicio)
+
+
+async def con_pool(guardado, verificaciones):
+    # Usuarios distintos para que el LRU no intervenga
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        security.verificar_password(f"bench-{i}-{time.perf_counter_ns()}", "secreto", guardado)
+        for i in range(verificaciones)
+    ))
+    return verificaciones / (time.perf_counter() - inicio)
+
+
+async def principal(args):
+    nucleos = os.cpu_count() or 1
+    print(f"núcleos: {nucleos}, hilos del pool: {security.HILOS_HASH}")
+    print(f"{'log2(N)':<9}{'ms/verif':>10}{'1 núcleo/s':>12}{'pool/s':>10}{'pool/s/núcleo':>15}")
+
+    for log_n in args.costos:
+        guardado = security.hash_password("secreto", log_n=log_n)
+        por_nucleo = por_segundo(lambda: security.verify_password("secreto", guardado), args.segundos)
+        total = await con_pool(guardado, max(nucleos * 4, int(por_nucleo * nucleos * args.segundos)))
+        print(f"{log_n:<9}{1000 / por_nucleo:>10.2f}{por_nucleo:>12.1f}{total:>10.1f}{total / nucleos:>15.1f}")
+
+    guardado = security.hash_password("secreto")
+    clave = "bench-cache"
+    await security.verificar_password(clave, "secreto", guardado)
+    inicio = time.perf_counter()
+    for _ in range(args.repeticiones_cache):
+        await security.verificar_password(clave, "secreto", guardado)
+    print(f"acierto en LRU: {args.repeticiones_cache / (time.perf_counter() - inicio):.0f} verificaciones/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--costos", type=int, nargs="+", default=[12, 13, 14, 15])
+    parser.add_argument("--segundos", type=float, default=2.0)
+    parser.add_argument("--repeticiones-cache", type=int, default=100000)
+    asyncio.run(principal(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""Compara peticiones/s del login síncrono (threadpool) contra el asíncrono.
+
+Usa SQLite/aiosqlite como sustituto local de MySQL. Como SQLite no tiene
+latencia de red, la diferencia real contra MySQL es mayor que la medida aquí.
+
+Desde el directorio backend:
+    python -m benchmarks.bench_login_async --peticiones 3000 --concurrencia 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+# La URL se debe fijar antes de importar database
+DB_PATH = Path(tempfile.gettempdir()) / "bench_login_async.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+
+from database import engine, async_engine, metadata  # noqa: E402
+from models.usuario import alumno  # noqa: E402
+from routes.login import router as login_router  # noqa: E402
+from schemas.login import LoginRequest  # noqa: E402
+
+ALUMNOS = 1000
+
+
+def preparar_base():
+    if DB_PATH.exists():
+        DB_PATH.unlink()
+    metadata.create_all(engine, tables=[alumno])
+    with engine.begin() as conn:
+        conn.execute(alumno.insert(), [
+            {"matricula": f"A{i:05d}", "nombre": "Alumno", "ape1": "Uno", "ape2": "Dos",
+             "numGrupo": 3401, "password": "secreto"}
+            for i in range(ALUMNOS)
+        ])
+
+
+def app_sincrona():
+    # Versión original: `def` + engine.connect(), cada petición ocupa un hilo
+    app = FastAPI()
+
+    @app.post("/login/")
+    def login_sync(data: LoginRequest):
+        with engine.connect() as conn:
+            result = conn.execute(select(alumno).where(alumno.c.matricula == data.usuario)).fetchone()
+            if not result:
+                raise HTTPException(status_code=404, detail="Alumno no encontrado")
+            if result.password != data.password:
+                raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+            return {"message": "Login exitoso", "matricula": result.matricula, "rol": data.rol}
+
+    return app
+
+
+def app_asincrona():
+    app = FastAPI()
+    app.include_router(login_router)
+    return app
+
+
+async def medir(app, peticiones, concurrencia):
+    semaforo = asyncio.Semaphore(concurrencia)
+    errores = 0
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as cliente:
+        async def una(i):
+            nonlocal errores
+            datos = {"rol": 1, "usuario": f"A{i % ALUMNOS:05d}", "password": "secreto"}
+            async with semaforo:
+                r = await cliente.post("/login/", json=datos)
+            if r.status_code != 200:
+                errores += 1
+
+        # Calentamiento: abre el pool y llena los cachés de SQLAlchemy
+        await asyncio.gather(*(una(i) for i in range(min(100, peticiones))))
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(una(i) for i in range(peticiones)))
+        duracion = time.perf_counter() - inicio
+
+    return peticiones / duracion, errores
+
+
+async def principal(args):
+    preparar_base()
+    print(f"{'modo':<10}{'peticiones/s':>15}{'errores':>10}")
+    for nombre, fabrica in (("sync", app_sincrona), ("async", app_asincrona)):
+        rps, errores = await medir(fabrica(), args.peticiones, args.concurrencia)
+        print(f"{nombre:<10}{rps:>15.1f}{errores:>10}")
+    await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=3000)
+    parser.add_argument("--concurrencia", type=int, default=200)
+    asyncio.run(principal(parser.parse_args()))
@@ -0,0 +1,71 @@
+"""Costo por petición de construir y ejecutar la consulta de login.
+
+Compara el select() original (todas las columnas, armado en cada llamada)
+contra el lambda_stmt con columnas podadas de routes/login.py. Se mide solo
+la construcción y también construcción + ejecución sobre SQLite en memoria,
+donde el tiempo de la base es mínimo y domina el trabajo de SQLAlchemy.
+
+Desde el directorio backend:
+    python -m benchmarks.bench_login_query --iteraciones 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + str(Path(tempfile.gettempdir()) / "bench_login_query.db"))
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from database import metadata  # noqa: E402
+from models.usuario import alumno  # noqa: E402
+from routes.login import consulta_login_alumno  # noqa: E402
+
+ALUMNOS = 500
+
+
+def original(matricula):
+    return select(alumno).where(alumno.c.matricula == matricula)
+
+
+def medir(funcion, iteraciones):
+    inicio = time.perf_counter()
+    for i in range(iteraciones):
+        funcion(i)
+    return (time.perf_counter() - inicio) / iteraciones * 1e6  # µs por llamada
+
+
+def principal(args):
+    motor = create_engine("sqlite://", poolclass=StaticPool)
+    metadata.create_all(motor, tables=[alumno])
+    with motor.begin() as conn:
+        conn.execute(alumno.insert(), [
+            {"matricula": f"A{i:05d}", "nombre": "Alumno", "password": "secreto"} for i in range(ALUMNOS)
+        ])
+
+    with motor.connect() as conn:
+        # Comprueba que el lambda no se quede con el primer valor
+        for i in (1, 2):
+            assert conn.execute(consulta_login_alumno(f"A{i:05d}")).fetchone().matricula == f"A{i:05d}"
+
+        casos = {
+            "original": original,
+            "lambda_stmt": consulta_login_alumno,
+        }
+        print(f"{'consulta':<14}{'construir µs':>14}{'construir+ejecutar µs':>24}")
+        for nombre, fabrica in casos.items():
+            construir = medir(lambda i: fabrica(f"A{i % ALUMNOS:05d}"), args.iteraciones)
+            ejecutar = medir(
+                lambda i: conn.execute(fabrica(f"A{i % ALUMNOS:05d}")).fetchone(), args.iteraciones
+            )
+            print(f"{nombre:<14}{construir:>14.2f}{ejecutar:>24.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iteraciones", type=int, default=20000)
+    principal(parser.parse_args())
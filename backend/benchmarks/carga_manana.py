@@ -0,0 +1,363 @@
+"""Simula la tormenta de lecturas de la mañana contra el servidor completo.
+
+Levanta `main:app` con uvicorn en otro proceso sobre SQLite (sustituto local
+de MySQL) y lanza al mismo tiempo:
+
+  - N lectores, cada uno con M alumnos que llegan en ráfaga: la mayoría
+    en los primeros minutos (distribución beta), con rebotes de tarjeta
+    y señales de vida periódicas;
+  - profesores que abren la lista, el pase del día y el reporte del grupo;
+  - alumnos que consultan su resumen, el horario y su página.
+
+Reporta p50/p95/p99, peticiones/s y errores por operación y guarda todo en
+benchmarks/resultados/<fecha>-<commit>.json. Con --comparar se compara
+contra otra corrida y termina con código 1 si alguna operación empeoró más
+que --tolerancia.
+
+Desde el directorio backend:
+    python -m benchmarks.carga_manana --lectores 20 --alumnos 100 --duracion 20
+    python -m benchmarks.carga_manana --comparar benchmarks/resultados/<anterior>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTADOS_DIR = Path(__file__).resolve().parent / "resultados"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# La URL se debe fijar antes de importar database
+TRABAJO_DIR = Path(tempfile.gettempdir()) / "carga_manana"
+DB_PATH = TRABAJO_DIR / "carga.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+
+import httpx  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from database import engine  # noqa: E402
+from models.asistencia import asistencia  # noqa: E402
+from models.horario import horario  # noqa: E402
+from models.materia_alumno import materia_alumno  # noqa: E402
+from models.tarjeta import tarjeta  # noqa: E402
+from models.usuario import alumno, usuario  # noqa: E402
+from utils.migraciones import aplicar_migraciones  # noqa: E402
+
+PASSWORD = "secreto"
+ADMIN = 1
+
+
+def preparar_base(args, inicio_clase):
+    """Un grupo y una materia por lector; la clase empieza a la mitad de la ráfaga."""
+    TRABAJO_DIR.mkdir(exist_ok=True)
+    for ruta in TRABAJO_DIR.iterdir():
+        if ruta.is_file():
+            ruta.unlink()
+
+    alumnos, profesores, materias, tarjetas, sesiones = [], [], [], [], []
+    for l in range(args.lectores):
+        grupo, claveM, clave_p = 3401 + l, f"MAT-{l:04d}", 100 + l
+        profesores.append({"claveP": clave_p, "nombre": "Profesor", "ape1": f"P{l}", "idRol": 2, "password": PASSWORD})
+        sesiones.append({
+            "claveM": claveM, "materia": f"Materia {l}", "numGrupo": grupo, "claveP": clave_p,
+            "aula": f"L{l:03d}", "dia": inicio_clase.weekday(),
+            "hora_inicio": inicio_clase.time().replace(microsecond=0),
+            "hora_fin": (inicio_clase + timedelta(hours=2)).time().replace(microsecond=0),
+        })
+        for a in range(args.alumnos):
+            matricula = f"{l:03d}{a:05d}"
+            alumnos.append({"matricula": matricula, "nombre": "Alumno", "ape1": f"A{a}", "numGrupo": grupo, "password": PASSWORD})
+            materias.append({"claveM": claveM, "matricula": matricula})
+            tarjetas.append({"uid": f"U{matricula}", "matricula": matricula, "activa": True, "actualizado": datetime.now()})
+    profesores.append({"claveP": ADMIN, "nombre": "Admin", "ape1": "X", "idRol": 3, "password": PASSWORD})
+
+    aplicar_migraciones()
+    with engine.begin() as conn:
+        conn.execute(alumno.insert(), alumnos)
+        conn.execute(usuario.insert(), profesores)
+        conn.execute(materia_alumno.insert(), materias)
+        conn.execute(tarjeta.insert(), tarjetas)
+        conn.execute(horario.insert(), sesiones)
+    engine.dispose()
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def levantar_servidor(puerto):
+    env = {
+        **os.environ,
+        "RFID_SPOOL_DIR": str(TRABAJO_DIR / "spool"),
+        "SECRET_KEY": "carga-manana",
+        "LOG_LEVEL": "WARNING",
+    }
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+async def esperar_servidor(url, proceso, limite=30):
+    async with httpx.AsyncClient(base_url=url) as cliente:
+        fin = time.monotonic() + limite
+        while time.monotonic() < fin:
+            if proceso.poll() is not None:
+                raise RuntimeError("El servidor terminó al arrancar")
+            try:
+                if (await cliente.get("/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+class Medidor:
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.errores = defaultdict(int)
+
+    async def medir(self, operacion, peticion):
+        inicio = time.perf_counter()
+        try:
+            r = await peticion
+            ok = r.status_code < 400
+        except httpx.HTTPError:
+            r, ok = None, False
+        self.latencias[operacion].append(time.perf_counter() - inicio)
+        if not ok:
+            self.errores[operacion] += 1
+        return r
+
+
+def percentil(ordenados, p):
+    if not ordenados:
+        return None
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+async def lector(cliente, medidor, id_lector, llegadas, args, t0, rng):
+    """Manda las lecturas de su aula en orden, una por petición, como un lector real."""
+    siguiente_senal = 0.0
+    for t, uid in llegadas:
+        espera = t0 + t - time.monotonic()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        if t >= siguiente_senal:
+            siguiente_senal = t + args.intervalo_senal
+            await medidor.medir("senal_lector", cliente.post(f"/lectores/{id_lector}/senal", json={"firmware": "1.0", "cola": 0}))
+        repeticiones = 2 if rng.random() < args.rebotes else 1
+        for _ in range(repeticiones):
+            await medidor.medir("lectura_rfid", cliente.post("/rfid/lecturas", json={"uid": uid, "lector": id_lector}))
+
+
+async def login(cliente, medidor, rol, usuario_):
+    r = await medidor.medir("login", cliente.post("/login/", json={"rol": rol, "usuario": usuario_, "password": PASSWORD}))
+    if r is None or r.status_code != 200:
+        return None
+    return {"Authorization": "Bearer " + r.json()["token"]}
+
+
+async def profesor(cliente, medidor, l, fin, rng):
+    headers = await login(cliente, medidor, 2, str(100 + l))
+    if headers is None:
+        return
+    etags = {}
+    while time.monotonic() < fin:
+        for operacion, ruta in (
+            ("lista_materia", f"/materias/MAT-{l:04d}/alumnos"),
+            ("pase_del_dia", f"/asistencias/materia/MAT-{l:04d}"),
+            ("reporte_grupo", f"/reportes/grupo/{3401 + l}"),
+        ):
+            # Igual que el navegador: revalida con el ETag que ya tiene
+            h = {**headers, "If-None-Match": etags[ruta]} if ruta in etags else headers
+            r = await medidor.medir(operacion, cliente.get(ruta, headers=h))
+            if r is not None and "etag" in r.headers:
+                etags[ruta] = r.headers["etag"]
+        await asyncio.sleep(rng.uniform(1, 3))
+
+
+async def estudiante(cliente, medidor, args, fin, rng):
+    while time.monotonic() < fin:
+        l, a = rng.randrange(args.lectores), rng.randrange(args.alumnos)
+        matricula = f"{l:03d}{a:05d}"
+        headers = await login(cliente, medidor, 1, matricula)
+        if headers is not None:
+            await medidor.medir("pagina_alumno", cliente.get("/static/alumno.html", headers={"Accept-Encoding": "gzip"}))
+            await medidor.medir("resumen_alumno", cliente.get(f"/asistencias/alumno/{matricula}/resumen", headers=headers))
+            await medidor.medir("horario_grupo", cliente.get("/horario/", params={"numGrupo": 3401 + l}))
+        await asyncio.sleep(rng.uniform(0.5, 2))
+
+
+def llegadas_por_lector(args, rng):
+    """Tiempo de llegada de cada alumno: beta(2, 5) concentra la ráfaga al principio."""
+    por_lector = {}
+    for l in range(args.lectores):
+        llegadas = sorted(
+            (rng.betavariate(2, 5) * args.duracion, f"U{l:03d}{a:05d}")
+            for a in range(args.alumnos)
+            if rng.random() >= args.faltas
+        )
+        por_lector[f"L{l:03d}"] = llegadas
+    return por_lector
+
+
+def resumen(medidor, duracion):
+    operaciones = {}
+    for operacion, valores in sorted(medidor.latencias.items()):
+        ordenados = sorted(valores)
+        operaciones[operacion] = {
+            "peticiones": len(valores),
+            "errores": medidor.errores[operacion],
+            "tasa_error": round(medidor.errores[operacion] / len(valores), 4),
+            "por_segundo": round(len(valores) / duracion, 1),
+            **{f"p{p}_ms": round(percentil(ordenados, p) * 1000, 2) for p in (50, 95, 99)},
+            "max_ms": round(ordenados[-1] * 1000, 2),
+        }
+    return operaciones
+
+
+def imprimir(operaciones):
+    print(f"{'operación':<16}{'peticiones':>11}{'/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errores':>9}")
+    for nombre, o in operaciones.items():
+        print(
+            f"{nombre:<16}{o['peticiones']:>11}{o['por_segundo']:>8}{o['p50_ms']:>9}"
+            f"{o['p95_ms']:>9}{o['p99_ms']:>9}{o['errores']:>9}"
+        )
+
+
+def comparar(actual, anterior, tolerancia, margen_ms):
+    """Regresa las operaciones cuyo p95 o tasa de error empeoraron más que la tolerancia.
+
+    Un cambio de p95 cuenta solo si pasa la tolerancia relativa y además
+    `margen_ms`, para no marcar ruido en operaciones de pocos milisegundos.
+    """
+    regresiones = []
+    print(f"\ncontra {anterior['version']} ({anterior['fecha']}):")
+    carga = ("lectores", "alumnos", "duracion", "profesores", "estudiantes", "rebotes", "faltas", "semilla")
+    distintos = [p for p in carga if actual["parametros"].get(p) != anterior["parametros"].get(p)]
+    if distintos or actual["maquina"] != anterior["maquina"]:
+        print(f"  aviso: cambió la máquina o los parámetros ({', '.join(distintos) or 'máquina'}); la comparación no es directa")
+    for nombre, o in actual["operaciones"].items():
+        previa = anterior["operaciones"].get(nombre)
+        if previa is None:
+            continue
+        diferencia = o["p95_ms"] - previa["p95_ms"]
+        cambio = diferencia / previa["p95_ms"] if previa["p95_ms"] else 0.0
+        peor = (cambio > tolerancia and diferencia > margen_ms) or o["tasa_error"] > previa["tasa_error"] + 0.001
+        print(f"  {nombre:<16} p95 {previa['p95_ms']:>8} -> {o['p95_ms']:>8} ms ({cambio:+.0%}){'  REGRESIÓN' if peor else ''}")
+        if peor:
+            regresiones.append(nombre)
+    return regresiones
+
+
+def version():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocida"
+
+
+def asistencias_guardadas():
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(asistencia)).scalar()
+
+
+async def principal(args):
+    rng = random.Random(args.semilla)
+    # La clase empieza a la mitad de la ráfaga; las lecturas antes del inicio entran por la anticipación
+    inicio_clase = datetime.now() + timedelta(seconds=args.duracion / 2 + 5)
+    preparar_base(args, inicio_clase)
+    llegadas = llegadas_por_lector(args, rng)
+    esperadas = sum(len(v) for v in llegadas.values())
+
+    puerto = puerto_libre()
+    url = f"http://127.0.0.1:{puerto}"
+    proceso = levantar_servidor(puerto)
+    try:
+        await esperar_servidor(url, proceso)
+        medidor = Medidor()
+        limites = httpx.Limits(max_connections=args.conexiones, max_keepalive_connections=args.conexiones)
+        async with httpx.AsyncClient(base_url=url, limits=limites, timeout=30) as cliente:
+            t0 = time.monotonic()
+            fin = t0 + args.duracion
+            tareas = [lector(cliente, medidor, i, v, args, t0, random.Random(rng.random())) for i, v in llegadas.items()]
+            tareas += [profesor(cliente, medidor, l, fin, random.Random(rng.random())) for l in range(min(args.profesores, args.lectores))]
+            tareas += [estudiante(cliente, medidor, args, fin, random.Random(rng.random())) for _ in range(args.estudiantes)]
+            await asyncio.gather(*tareas)
+            duracion = time.monotonic() - t0
+            metricas = (await cliente.get("/metrics", params={"formato": "json"})).json()
+    finally:
+        # Al apagar el servidor drena el spool, así que el conteo final incluye todo
+        proceso.terminate()
+        proceso.wait(timeout=60)
+
+    operaciones = resumen(medidor, duracion)
+    total = sum(o["peticiones"] for o in operaciones.values())
+    resultado = {
+        "version": version(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "maquina": {"python": platform.python_version(), "sistema": platform.platform(), "nucleos": os.cpu_count()},
+        "parametros": vars(args),
+        "duracion_s": round(duracion, 2),
+        "peticiones": total,
+        "por_segundo": round(total / duracion, 1),
+        "asistencias": {"esperadas": esperadas, "guardadas": asistencias_guardadas()},
+        "operaciones": operaciones,
+        "metricas_servidor": metricas,
+    }
+
+    imprimir(operaciones)
+    print(f"\n{total} peticiones en {duracion:.1f} s ({resultado['por_segundo']}/s); "
+          f"asistencias {resultado['asistencias']['guardadas']}/{esperadas}")
+
+    RESULTADOS_DIR.mkdir(exist_ok=True)
+    salida = RESULTADOS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{resultado['version']}.json"
+    salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+    print(f"resultados en {salida}")
+
+    codigo = 0
+    faltantes = esperadas - resultado["asistencias"]["guardadas"]
+    if faltantes > 0:
+        # Una corrida rápida que pierde asistencias no es una corrida buena
+        print(f"  ERROR: faltan {faltantes} asistencias de {esperadas}")
+        codigo = 1
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        if comparar(resultado, anterior, args.tolerancia, args.margen_ms):
+            codigo = 1
+    return codigo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lectores", type=int, default=20)
+    parser.add_argument("--alumnos", type=int, default=100, help="alumnos por lector")
+    parser.add_argument("--duracion", type=float, default=20, help="segundos que dura la ráfaga")
+    parser.add_argument("--profesores", type=int, default=20)
+    parser.add_argument("--estudiantes", type=int, default=50, help="alumnos consultando la página al mismo tiempo")
+    parser.add_argument("--rebotes", type=float, default=0.2, help="fracción de lecturas que el lector repite")
+    parser.add_argument("--faltas", type=float, default=0.1, help="fracción de alumnos que no llegan")
+    parser.add_argument("--intervalo-senal", type=float, default=5)
+    parser.add_argument("--conexiones", type=int, default=100)
+    parser.add_argument("--semilla", type=int, default=2024)
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="aumento de p95 permitido (0.2 = 20 %%)")
+    parser.add_argument("--margen-ms", type=float, default=5, help="aumento de p95 en ms que se ignora como ruido")
+    sys.exit(asyncio.run(principal(parser.parse_args())))
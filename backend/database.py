@@ -1,6 +1,228 @@
-from sqlalchemy import create_engine, MetaData
+import logging
+import os
+import re
+import threading
+import time
 
-DATABASE_URL = "mysql+pymysql://root@localhost/default"  # Ajusta tus credenciales
+from sqlalchemy import create_engine, event, MetaData
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 
-engine = create_engine(DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "mysql+pymysql://root@localhost/default")  # Ajusta tus credenciales
+
+# Driver asíncrono equivalente a cada driver síncrono
+DRIVERS_ASYNC = {
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def url_async(url):
+    url = make_url(url)
+    return url.set(drivername=DRIVERS_ASYNC.get(url.drivername, url.drivername))
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or url_async(DATABASE_URL)
+
+# Configuración del pool de conexiones (aplica a ambos motores)
+POOL_CONFIG = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),  # MySQL cierra conexiones inactivas (wait_timeout)
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") == "1",
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+}
+
+
+class MetricasPool:
+    """Contadores del tiempo que se espera por una conexión del pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.checkouts_desbordados = 0
+        self.timeouts = 0
+
+    def registrar(self, espera, desbordado):
+        self.checkouts += 1
+        self.espera_total += espera
+        if espera > self.espera_max:
+            self.espera_max = espera
+        if desbordado:
+            self.checkouts_desbordados += 1
+
+
+def pool_instrumentado(base, nombre):
+    """Subclase del pool que mide cuánto tarda cada checkout.
+
+    Las métricas viven en la clase para sobrevivir a `engine.dispose()`,
+    que recrea el pool con la misma clase.
+    """
+    metricas = MetricasPool()
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = base.connect(self)
+        except PoolTimeoutError:
+            metricas.timeouts += 1
+            raise
+        metricas.registrar(time.perf_counter() - inicio, self.overflow() > 0)
+        return conexion
+
+    # Con el módulo de la base, el logger del pool sigue bajo "sqlalchemy.pool" y no sale en el log de la app
+    return type(nombre, (base,), {"connect": connect, "metricas": metricas, "__module__": base.__module__})
+
+
+def metricas_pool(motor):
+    pool = motor.pool
+    m = pool.metricas
+    return {
+        "tamano": pool.size(),
+        "en_uso": pool.checkedout(),
+        "disponibles": pool.checkedin(),
+        # overflow() arranca en -pool_size; solo es positivo con conexiones extra abiertas
+        "desbordamiento": max(pool.overflow(), 0),
+        "checkouts": m.checkouts,
+        "checkouts_desbordados": m.checkouts_desbordados,
+        "timeouts": m.timeouts,
+        "espera_promedio_ms": round(m.espera_total / m.checkouts * 1000, 3) if m.checkouts else 0.0,
+        "espera_max_ms": round(m.espera_max * 1000, 3),
+    }
+
+
+# Huellas de consultas: la sentencia sin valores, para agrupar las que solo cambian en parámetros
+SQL_HUELLAS_MAX = int(os.getenv("SQL_HUELLAS_MAX", "500"))
+SQL_UMBRAL_LENTO = float(os.getenv("SQL_UMBRAL_LENTO_MS", "200")) / 1000
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_PARAMETROS = re.compile(r"%\(\w+\)s|%s|(?<!:):\w+|\?")
+_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_FILAS = re.compile(r"\(\?\+\)(?:\s*,\s*\(\?\+\))+")
+_ESPACIOS = re.compile(r"\s+")
+
+
+def huella_sql(sentencia):
+    """La sentencia con literales y parámetros cambiados por `?`.
+
+    `IN (?, ?, ?)` y los VALUES de varias filas quedan como `(?+)` para que
+    el tamaño de la lista no genere una huella distinta.
+    """
+    huella = _CADENAS.sub("?", sentencia)
+    huella = _PARAMETROS.sub("?", huella)
+    huella = _NUMEROS.sub("?", huella)
+    huella = _LISTAS.sub("(?+)", huella)
+    huella = _FILAS.sub("(?+)", huella)
+    return _ESPACIOS.sub(" ", huella).strip()
+
+
+class EstadisticasConsultas:
+    """Llamadas, tiempo y filas por huella de consulta, en una tabla acotada.
+
+    Al llenarse se descarta la huella con menos tiempo acumulado, así las
+    caras se quedan. Las consultas que pasan del umbral se escriben al log
+    con su huella, nunca con los valores (puede haber hashes o matrículas).
+    """
+
+    def __init__(self, maximo=SQL_HUELLAS_MAX, umbral=SQL_UMBRAL_LENTO):
+        self.maximo = maximo
+        self.umbral = umbral
+        self._datos = {}  # huella -> [llamadas, tiempo_total, tiempo_max, filas]
+        self._huellas = {}  # sentencia -> huella; el texto casi no cambia gracias al cache de SQLAlchemy
+        self._lock = threading.Lock()
+        self.lentas = 0
+        self.descartadas = 0
+
+    def _huella(self, sentencia):
+        huella = self._huellas.get(sentencia)
+        if huella is None:
+            if len(self._huellas) >= self.maximo * 4:
+                self._huellas.clear()
+            huella = self._huellas[sentencia] = huella_sql(sentencia)
+        return huella
+
+    def registrar(self, sentencia, duracion, filas):
+        huella = self._huella(sentencia)
+        with self._lock:
+            datos = self._datos.get(huella)
+            if datos is None:
+                if len(self._datos) >= self.maximo:
+                    del self._datos[min(self._datos, key=lambda h: self._datos[h][1])]
+                    self.descartadas += 1
+                datos = self._datos[huella] = [0, 0.0, 0.0, 0]
+            datos[0] += 1
+            datos[1] += duracion
+            if duracion > datos[2]:
+                datos[2] = duracion
+            datos[3] += filas
+            if duracion >= self.umbral:
+                self.lentas += 1
+            else:
+                return
+        logger.warning(
+            "Consulta lenta", extra={"duracion_ms": round(duracion * 1000, 1), "filas": filas, "huella": huella}
+        )
+
+    def top(self, n=20, orden="total"):
+        columna = {"llamadas": 0, "total": 1, "max": 2, "filas": 3}[orden]
+        with self._lock:
+            filas = sorted(self._datos.items(), key=lambda par: par[1][columna], reverse=True)[:n]
+        return [
+            {
+                "huella": huella,
+                "llamadas": llamadas,
+                "total_ms": round(total * 1000, 3),
+                "promedio_ms": round(total / llamadas * 1000, 3),
+                "max_ms": round(maximo * 1000, 3),
+                "filas": filas_total,
+            }
+            for huella, (llamadas, total, maximo, filas_total) in filas
+        ]
+
+    def reiniciar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def metricas(self):
+        return {"huellas": len(self._datos), "lentas": self.lentas, "descartadas": self.descartadas}
+
+
+estadisticas_consultas = EstadisticasConsultas()
+
+# Otras mediciones que reciben la duración de cada consulta sin cronometrarla otra vez (utils/medicion.py)
+observadores_consultas = []
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    # En el contexto de ejecución y no en conn.info: si la consulta falla no queda nada colgado
+    context.inicio_huella = time.perf_counter()
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    duracion = time.perf_counter() - context.inicio_huella
+    # rowcount: filas leídas en MySQL (cursor con buffer) o afectadas; SQLite da -1 en SELECT
+    estadisticas_consultas.registrar(statement, duracion, max(cursor.rowcount, 0))
+    for observador in observadores_consultas:
+        observador(duracion)
+
+
+def vigilar_consultas(motor):
+    event.listen(motor, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(motor, "after_cursor_execute", _despues_de_ejecutar)
+
+
+# Motor síncrono: scripts y hilos de fondo
+engine = create_engine(DATABASE_URL, poolclass=pool_instrumentado(QueuePool, "PoolSync"), **POOL_CONFIG)
+# Motor asíncrono: rutas de FastAPI, no ocupa un hilo mientras espera a MySQL
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, poolclass=pool_instrumentado(AsyncAdaptedQueuePool, "PoolAsync"), **POOL_CONFIG
+)
+vigilar_consultas(engine)
+vigilar_consultas(async_engine.sync_engine)
 metadata = MetaData()
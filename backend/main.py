@@ -1,20 +1,88 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from sqlalchemy.exc import (
+    DataError, DisconnectionError, IntegrityError, InterfaceError, OperationalError, SQLAlchemyError,
+    TimeoutError as PoolTimeoutError,
+)
+from database import engine, async_engine, metricas_pool, estadisticas_consultas
 from routes.login import router as login_router
+from routes.rfid import router as rfid_router
+from routes.metricas import router as metricas_router
+from routes.asistencia import router as asistencia_router
+from routes.horario import router as horario_router
+from routes.materias import router as materias_router
+from routes.reportes import router as reportes_router
+from routes.lectores import router as lectores_router
+from utils.spool_rfid import spool_lecturas
+from utils.indice_tarjetas import indice_tarjetas
+from utils.indice_horario import indice_horario
+from utils.dedup_rfid import filtro_repetidas
+from utils.registro_lectores import registro_lectores
+from utils.canal_asistencia import canal_asistencia
+from utils.medicion import MedicionPeticiones, medir_consultas
+from utils.metricas import registrar_colector
+from utils.security import cache_verificaciones
+from utils.cache import cache_respuestas
+from utils.estaticos import EstaticosComprimidos
+from utils.logs import configurar_logging, detener_logging
+from utils.migraciones import MIGRAR_AL_INICIAR, aplicar_migraciones
+from utils.particiones import mantenimiento_particiones
+from utils.cierre_sesiones import cierre_sesiones
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse
 from pathlib import Path
 
 import os
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configurar_logging()
+    # Tablas e índices salen de las migraciones (backend/migraciones)
+    if MIGRAR_AL_INICIAR:
+        aplicar_migraciones()
+    # Carga completa del índice de tarjetas; después se refresca de forma incremental
+    indice_tarjetas.cargar()
+    indice_tarjetas.iniciar()
+    indice_horario.cargar()
+    indice_horario.iniciar()
+    spool_lecturas.iniciar()
+    registro_lectores.cargar()
+    registro_lectores.iniciar()
+    mantenimiento_particiones.iniciar()
+    cierre_sesiones.iniciar()
+    yield
+    try:
+        # Drena lo que se pueda antes de apagar; el resto queda en el spool en disco
+        spool_lecturas.detener()
+        indice_tarjetas.detener()
+        indice_horario.detener()
+        registro_lectores.detener()
+        mantenimiento_particiones.detener()
+        cierre_sesiones.detener()
+        await async_engine.dispose()
+    finally:
+        # Al final: los hilos de arriba todavía registran mensajes mientras se detienen
+        detener_logging()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Obtener la ruta absoluta a la carpeta "frontend"
 BASE_DIR = Path(__file__).resolve().parent
 FRONTEND_DIR = BASE_DIR.parent / "frontend"
 
-# Montamos los archivos estáticos en /static
-app.mount("/static", StaticFiles(directory=FRONTEND_DIR), name="static")
+# Montamos los archivos estáticos en /static, ya comprimidos y con ETag
+estaticos = EstaticosComprimidos(directory=FRONTEND_DIR)
+app.mount("/static", estaticos, name="static")
+
+# Latencia por ruta y tiempo en la base de cada petición
+medir_consultas()
+app.add_middleware(MedicionPeticiones)
 
 # Middleware CORS
 app.add_middleware(
@@ -25,8 +93,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Solo los errores pasajeros (conexión caída, pool agotado) merecen 503 con Retry-After;
+# reintentar un dato inválido o un duplicado daría el mismo error
+ERRORES_PASAJEROS = (OperationalError, InterfaceError, DisconnectionError, PoolTimeoutError)
+
+
+@app.exception_handler(SQLAlchemyError)
+async def error_base_de_datos(request: Request, exc: SQLAlchemyError):
+    if isinstance(exc, IntegrityError):
+        logger.info("Conflicto de integridad en %s %s: %s", request.method, request.url.path, exc.orig)
+        return JSONResponse(status_code=409, content={"detail": "El registro choca con datos existentes"})
+    if isinstance(exc, DataError):
+        logger.info("Dato inválido en %s %s: %s", request.method, request.url.path, exc.orig)
+        return JSONResponse(status_code=422, content={"detail": "Algún valor no es válido para la base de datos"})
+
+    logger.error("Error de base de datos en %s %s: %s", request.method, request.url.path, exc)
+    if isinstance(exc, ERRORES_PASAJEROS):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Base de datos no disponible, intenta más tarde"},
+            headers={"Retry-After": "5"},
+        )
+    return JSONResponse(status_code=500, content={"detail": "Error interno de base de datos"})
+
+
 # Rutas
 app.include_router(login_router)
+app.include_router(rfid_router)
+app.include_router(metricas_router)
+app.include_router(asistencia_router)
+app.include_router(horario_router)
+app.include_router(materias_router)
+app.include_router(reportes_router)
+app.include_router(lectores_router)
+
+# Métricas expuestas en /metrics
+registrar_colector("pool_sync", lambda: metricas_pool(engine))
+registrar_colector("pool_async", lambda: metricas_pool(async_engine))
+registrar_colector("consultas_sql", estadisticas_consultas.metricas)
+registrar_colector("spool_rfid", spool_lecturas.metricas)
+registrar_colector("indice_tarjetas", indice_tarjetas.metricas)
+registrar_colector("indice_horario", indice_horario.metricas)
+registrar_colector("rebote_rfid", filtro_repetidas.metricas)
+registrar_colector("lectores", registro_lectores.metricas)
+registrar_colector("particiones", mantenimiento_particiones.metricas)
+registrar_colector("cierre_sesiones", cierre_sesiones.metricas)
+registrar_colector("en_vivo", canal_asistencia.metricas)
+registrar_colector("http", MedicionPeticiones.metricas)
+registrar_colector("cache_passwords", cache_verificaciones.metricas)
+registrar_colector("cache_respuestas", cache_respuestas.metricas)
+registrar_colector("estaticos", estaticos.metricas)
 
 
 
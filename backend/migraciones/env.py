@@ -0,0 +1,45 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from database import engine, metadata
+# Todos los modelos, para que `metadata` tenga el esquema completo al autogenerar
+from models.asistencia import asistencia  # noqa: F401
+from models.horario import horario  # noqa: F401
+from models.lector import lector  # noqa: F401
+from models.lectura_rfid import lectura_rfid  # noqa: F401
+from models.materia_alumno import materia_alumno  # noqa: F401
+from models.resumen_asistencia import resumen_asistencia  # noqa: F401
+from models.tarjeta import tarjeta  # noqa: F401
+from models.usuario import alumno, usuario  # noqa: F401
+
+config = context.config
+
+# Desde la línea de comandos; la app ya configuró su propio logging
+if config.config_file_name is not None and "connection" not in config.attributes:
+    fileConfig(config.config_file_name)
+
+
+def correr_offline():
+    context.configure(url=engine.url, target_metadata=metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def correr_online():
+    conexion = config.attributes.get("connection")
+    if conexion is not None:
+        context.configure(connection=conexion, target_metadata=metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+    with engine.connect() as conexion:
+        context.configure(connection=conexion, target_metadata=metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    correr_offline()
+else:
+    correr_online()
@@ -0,0 +1,157 @@
+"""Esquema base
+
+Las tablas como las dejaba `create_all` antes de las migraciones. USUARIO,
+ALUMNO y MATERIA_ALUMNO venían de la base de la escuela; aquí solo se crean
+si faltan. Las bases que ya existían pasan por esta revisión sin cambios y
+solo se crea lo que no esté.
+
+Las tablas que sí se crean quedan anotadas en MIGRACION_0001_TABLAS, y el
+downgrade borra solo esas: nunca las de la escuela ni las que ya había.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ID = sa.BigInteger().with_variant(sa.Integer, "sqlite")
+CREADAS = "MIGRACION_0001_TABLAS"  # Tablas que creó esta revisión
+
+logger = logging.getLogger(__name__)
+
+
+def _tablas():
+    # En orden de dependencias: las FK apuntan a tablas ya creadas
+    return [
+        ("USUARIO", lambda: op.create_table(
+            "USUARIO",
+            sa.Column("claveP", sa.Integer, primary_key=True),
+            sa.Column("claveT", sa.String(10)),
+            sa.Column("nombre", sa.String(20)),
+            sa.Column("ape1", sa.String(15)),
+            sa.Column("ape2", sa.String(15)),
+            sa.Column("idRol", sa.Integer),
+            sa.Column("password", sa.String(100)),
+        )),
+        ("ALUMNO", lambda: op.create_table(
+            "ALUMNO",
+            sa.Column("matricula", sa.String(10), primary_key=True),
+            sa.Column("claveT", sa.String(10)),
+            sa.Column("nombre", sa.String(20)),
+            sa.Column("ape1", sa.String(15)),
+            sa.Column("ape2", sa.String(15)),
+            sa.Column("numGrupo", sa.Integer),
+            sa.Column("password", sa.String(100)),
+        )),
+        ("MATERIA_ALUMNO", lambda: op.create_table(
+            "MATERIA_ALUMNO",
+            sa.Column("claveM", sa.String(10), nullable=False),
+            sa.Column("matricula", sa.String(10), sa.ForeignKey("ALUMNO.matricula"), nullable=False),
+            sa.PrimaryKeyConstraint("claveM", "matricula"),
+        )),
+        ("LECTURA_RFID", lambda: op.create_table(
+            "LECTURA_RFID",
+            sa.Column("id", ID, primary_key=True, autoincrement=True),
+            sa.Column("uid", sa.String(20), nullable=False),
+            sa.Column("lector", sa.String(20), nullable=False),
+            sa.Column("matricula", sa.String(10)),
+            sa.Column("claveM", sa.String(10)),
+            sa.Column("sesion", sa.Time),
+            sa.Column("momento", sa.DateTime, nullable=False),
+            sa.Column("recibido", sa.DateTime, nullable=False),
+        )),
+        ("TARJETA", lambda: op.create_table(
+            "TARJETA",
+            sa.Column("uid", sa.String(20), primary_key=True),
+            sa.Column("matricula", sa.String(10), sa.ForeignKey("ALUMNO.matricula"), nullable=False),
+            sa.Column("activa", sa.Boolean, nullable=False),
+            sa.Column("actualizado", sa.DateTime, nullable=False),
+            sa.Index("ix_TARJETA_actualizado", "actualizado"),
+        )),
+        ("ASISTENCIA", lambda: op.create_table(
+            "ASISTENCIA",
+            sa.Column("id", ID, primary_key=True, autoincrement=True),
+            sa.Column("matricula", sa.String(10), sa.ForeignKey("ALUMNO.matricula"), nullable=False),
+            sa.Column("claveM", sa.String(10), nullable=False),
+            sa.Column("fecha", sa.Date, nullable=False),
+            sa.Column("hora", sa.Time, nullable=False),
+            sa.Column("estado", sa.String(10), nullable=False),
+            sa.Column("origen", sa.String(10), nullable=False),
+            sa.Column("registrado", sa.DateTime, nullable=False),
+            sa.UniqueConstraint("matricula", "fecha", "claveM", "hora", name="uq_asistencia_alumno_fecha"),
+            sa.Index("ix_asistencia_materia_fecha", "claveM", "fecha"),
+        )),
+        ("HORARIO", lambda: op.create_table(
+            "HORARIO",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("claveM", sa.String(10), nullable=False),
+            sa.Column("materia", sa.String(60), nullable=False),
+            sa.Column("numGrupo", sa.Integer, nullable=False),
+            sa.Column("claveP", sa.Integer, sa.ForeignKey("USUARIO.claveP")),
+            sa.Column("aula", sa.String(20), nullable=False),
+            sa.Column("dia", sa.Integer, nullable=False),
+            sa.Column("hora_inicio", sa.Time, nullable=False),
+            sa.Column("hora_fin", sa.Time, nullable=False),
+            sa.Index("ix_horario_grupo_dia", "numGrupo", "dia"),
+        )),
+        ("RESUMEN_ASISTENCIA", lambda: op.create_table(
+            "RESUMEN_ASISTENCIA",
+            sa.Column("matricula", sa.String(10), primary_key=True),
+            sa.Column("claveM", sa.String(10), primary_key=True),
+            sa.Column("asistencias", sa.Integer, nullable=False),
+            sa.Column("retardos", sa.Integer, nullable=False),
+            sa.Column("total", sa.Integer, nullable=False),
+            sa.Column("actualizado", sa.DateTime, nullable=False),
+        )),
+        ("LECTOR", lambda: op.create_table(
+            "LECTOR",
+            sa.Column("id", sa.String(20), primary_key=True),
+            sa.Column("firmware", sa.String(40)),
+            sa.Column("cola", sa.Integer, nullable=False),
+            sa.Column("ultima_senal", sa.DateTime, nullable=False),
+        )),
+    ]
+
+
+def upgrade():
+    # Con --sql no hay base que revisar: se genera el script completo
+    existentes = set() if op.get_context().as_sql else set(sa.inspect(op.get_bind()).get_table_names())
+    creadas = []
+    for nombre, crear in _tablas():
+        if nombre not in existentes:
+            crear()
+            creadas.append(nombre)
+    registro = op.create_table(CREADAS, sa.Column("nombre", sa.String(40), primary_key=True))
+    if creadas:
+        op.bulk_insert(registro, [{"nombre": n} for n in creadas])
+
+    if "RESUMEN_ASISTENCIA" not in existentes and "ASISTENCIA" in existentes:
+        # El resumen llega a una base con asistencias previas: parte de lo que ya hay
+        from utils.resumen import reconstruir_resumen
+
+        reconstruir_resumen(op.get_bind())
+
+
+def downgrade():
+    if op.get_context().as_sql:
+        # Sin base que revisar: el script offline de upgrade crea todas
+        creadas = {nombre for nombre, _ in _tablas()}
+    elif CREADAS not in sa.inspect(op.get_bind()).get_table_names():
+        # Migrada antes de que existiera la anotación: no se sabe qué es seguro borrar
+        logger.warning("Sin %s: el downgrade de 0001 no borra ninguna tabla", CREADAS)
+        return
+    else:
+        creadas = set(op.get_bind().execute(sa.select(sa.table(CREADAS, sa.column("nombre")).c.nombre)).scalars())
+    # Al revés del orden de creación: primero las que tienen FK
+    for nombre, _ in reversed(_tablas()):
+        if nombre in creadas:
+            op.drop_table(nombre)
+    op.drop_table(CREADAS)
@@ -0,0 +1,39 @@
+"""Índices para las consultas frecuentes
+
+Login por (claveP, idRol), alumnos por grupo, tarjetas por alumno y
+materias por alumno. La búsqueda de asistencia por (claveM, fecha) ya la
+cubre ix_asistencia_materia_fecha y la de (matricula, fecha) el prefijo de
+uq_asistencia_alumno_fecha; otro índice igual solo haría más lento cada
+pase de lista.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ("ix_usuario_clave_rol", "USUARIO", ["claveP", "idRol"]),
+    ("ix_alumno_grupo", "ALUMNO", ["numGrupo"]),
+    ("ix_tarjeta_matricula", "TARJETA", ["matricula"]),
+    # Antes se creaba al arrancar la app; puede existir ya
+    ("ix_materia_alumno_matricula", "MATERIA_ALUMNO", ["matricula"]),
+]
+
+
+def upgrade():
+    inspector = None if op.get_context().as_sql else sa.inspect(op.get_bind())
+    for nombre, tabla, columnas in INDICES:
+        if inspector is None or nombre not in {i["name"] for i in inspector.get_indexes(tabla)}:
+            op.create_index(nombre, tabla, columnas)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
@@ -0,0 +1,92 @@
+"""Particiones mensuales de ASISTENCIA
+
+Solo en MySQL: RANGE COLUMNS(fecha), un mes por partición y `p_futuro`
+para lo demás. Casi todas las consultas filtran por fecha, así que MySQL
+lee solo las particiones del periodo. Los meses siguientes los crea
+`utils/particiones.py`.
+
+MySQL pide que la fecha sea parte de toda llave única, así que la PK pasa
+a (id, fecha). Además, no admite llaves foráneas en tablas particionadas,
+así que se quita la FK a ALUMNO en todos los motores. En SQLite la tabla se
+reconstruye sin la FK y no se particiona.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from datetime import date
+
+import sqlalchemy as sa
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+MESES_ADELANTE = 3
+
+
+def _mes_siguiente(mes):
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def _asistencia_sin_fk():
+    return sa.Table(
+        "ASISTENCIA",
+        sa.MetaData(),
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer, "sqlite"), primary_key=True, autoincrement=True),
+        sa.Column("matricula", sa.String(10), nullable=False),
+        sa.Column("claveM", sa.String(10), nullable=False),
+        sa.Column("fecha", sa.Date, nullable=False),
+        sa.Column("hora", sa.Time, nullable=False),
+        sa.Column("estado", sa.String(10), nullable=False),
+        sa.Column("origen", sa.String(10), nullable=False),
+        sa.Column("registrado", sa.DateTime, nullable=False),
+        sa.UniqueConstraint("matricula", "fecha", "claveM", "hora", name="uq_asistencia_alumno_fecha"),
+        sa.Index("ix_asistencia_materia_fecha", "claveM", "fecha"),
+    )
+
+
+def upgrade():
+    if op.get_context().dialect.name != "mysql":
+        with op.batch_alter_table("ASISTENCIA", recreate="always", copy_from=_asistencia_sin_fk()):
+            pass
+        return
+
+    hoy = date.today()
+    primero = date(hoy.year, hoy.month, 1)
+    if op.get_context().as_sql:
+        # Sin base que revisar: el nombre que MySQL le da a la FK creada en 0001
+        op.drop_constraint("ASISTENCIA_ibfk_1", "ASISTENCIA", type_="foreignkey")
+    else:
+        for fk in sa.inspect(op.get_bind()).get_foreign_keys("ASISTENCIA"):
+            op.drop_constraint(fk["name"], "ASISTENCIA", type_="foreignkey")
+        antigua = op.get_bind().execute(sa.text("SELECT MIN(fecha) FROM `ASISTENCIA`")).scalar()
+        if antigua is not None and antigua < primero:
+            primero = date(antigua.year, antigua.month, 1)
+
+    # Quitar y poner la PK en la misma sentencia: id es AUTO_INCREMENT y no puede quedarse sin llave
+    op.execute("ALTER TABLE `ASISTENCIA` DROP PRIMARY KEY, ADD PRIMARY KEY (id, fecha)")
+
+    ultimo = date(hoy.year, hoy.month, 1)
+    for _ in range(MESES_ADELANTE):
+        ultimo = _mes_siguiente(ultimo)
+    particiones = []
+    mes = primero
+    while mes <= ultimo:
+        siguiente = _mes_siguiente(mes)
+        particiones.append(f"PARTITION p{mes:%Y%m} VALUES LESS THAN ('{siguiente.isoformat()}')")
+        mes = siguiente
+    particiones.append("PARTITION p_futuro VALUES LESS THAN (MAXVALUE)")
+    op.execute(f"ALTER TABLE `ASISTENCIA` PARTITION BY RANGE COLUMNS(fecha) ({', '.join(particiones)})")
+
+
+def downgrade():
+    if op.get_context().dialect.name == "mysql":
+        op.execute("ALTER TABLE `ASISTENCIA` REMOVE PARTITIONING")
+        op.execute("ALTER TABLE `ASISTENCIA` DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+        op.create_foreign_key(None, "ASISTENCIA", "ALUMNO", ["matricula"], ["matricula"])
+        return
+    with op.batch_alter_table("ASISTENCIA", recreate="always") as batch:
+        batch.create_foreign_key("fk_asistencia_alumno", "ALUMNO", ["matricula"], ["matricula"])
@@ -0,0 +1,23 @@
+from sqlalchemy import (
+    Table, Column, BigInteger, Integer, String, Date, Time, DateTime, UniqueConstraint, Index
+)
+from database import metadata
+
+# Asistencia por alumno y sesión de clase (una sesión = materia + fecha + hora de inicio).
+# En MySQL está particionada por mes (migración 0003): la PK real es (id, fecha) y no
+# lleva FK a ALUMNO, porque MySQL no las admite en tablas particionadas.
+asistencia = Table(
+    "ASISTENCIA",
+    metadata,
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("matricula", String(10), nullable=False),
+    Column("claveM", String(10), nullable=False),
+    Column("fecha", Date, nullable=False),
+    Column("hora", Time, nullable=False),  # Hora de inicio de la sesión
+    Column("estado", String(10), nullable=False),  # presente / ausente / retardo
+    Column("origen", String(10), nullable=False),  # rfid / manual
+    Column("registrado", DateTime, nullable=False),
+    # Un registro por alumno y sesión; el orden de columnas también sirve para buscar por (matricula, fecha)
+    UniqueConstraint("matricula", "fecha", "claveM", "hora", name="uq_asistencia_alumno_fecha"),
+    Index("ix_asistencia_materia_fecha", "claveM", "fecha"),
+)
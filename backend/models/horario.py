@@ -0,0 +1,18 @@
+from sqlalchemy import Table, Column, Integer, String, Time, ForeignKey, Index
+from database import metadata
+
+# Horario semanal: una fila por sesión de clase
+horario = Table(
+    "HORARIO",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("claveM", String(10), nullable=False),
+    Column("materia", String(60), nullable=False),
+    Column("numGrupo", Integer, nullable=False),
+    Column("claveP", Integer, ForeignKey("USUARIO.claveP")),  # Profesor que la imparte
+    Column("aula", String(20), nullable=False),  # Mismo identificador que el lector RFID del salón
+    Column("dia", Integer, nullable=False),  # 0 = lunes ... 6 = domingo, igual que date.weekday()
+    Column("hora_inicio", Time, nullable=False),
+    Column("hora_fin", Time, nullable=False),
+    Index("ix_horario_grupo_dia", "numGrupo", "dia"),
+)
@@ -0,0 +1,12 @@
+from sqlalchemy import Table, Column, String, Integer, DateTime
+from database import metadata
+
+# Último estado conocido de cada lector RFID; se guarda por lotes desde la memoria
+lector = Table(
+    "LECTOR",
+    metadata,
+    Column("id", String(20), primary_key=True),  # Mismo identificador que manda en las lecturas (el aula)
+    Column("firmware", String(40)),
+    Column("cola", Integer, nullable=False, default=0),  # Lecturas pendientes en el lector
+    Column("ultima_senal", DateTime, nullable=False),
+)
@@ -0,0 +1,16 @@
+from sqlalchemy import Table, Column, BigInteger, Integer, String, DateTime, Time
+from database import metadata
+
+# Lecturas crudas que envían los lectores RFID de los salones
+lectura_rfid = Table(
+    "LECTURA_RFID",
+    metadata,
+    Column("id", BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True),
+    Column("uid", String(20), nullable=False),  # UID de la tarjeta
+    Column("lector", String(20), nullable=False),  # Identificador del lector
+    Column("matricula", String(10)),  # Alumno dueño de la tarjeta (nulo si no se reconoce)
+    Column("claveM", String(10)),  # Materia que se imparte en ese salón a esa hora (nulo si no hay clase)
+    Column("sesion", Time),  # Hora de inicio de esa sesión
+    Column("momento", DateTime, nullable=False),  # Hora en que se pasó la tarjeta
+    Column("recibido", DateTime, nullable=False),  # Hora en que llegó al servidor
+)
@@ -1,11 +1,12 @@
-from sqlalchemy import Table, Column, String, MetaData, ForeignKey, PrimaryKeyConstraint
-
-metadata = MetaData()
+from sqlalchemy import Table, Column, String, ForeignKey, PrimaryKeyConstraint, Index
+from database import metadata
 
 materia_alumno = Table(
     "MATERIA_ALUMNO",
     metadata,
     Column("claveM", String(10), nullable=False),  # No puede ser nulo (como indica la imagen)
     Column("matricula", String(10), ForeignKey("ALUMNO.matricula"), nullable=False),  # Clave foránea + no nulo
-    PrimaryKeyConstraint("claveM", "matricula")  # Clave primaria compuesta
-)
\ No newline at end of file
+    PrimaryKeyConstraint("claveM", "matricula"),  # Clave primaria compuesta
+    # La PK solo sirve para buscar por materia; este índice cubre las búsquedas por alumno
+    Index("ix_materia_alumno_matricula", "matricula"),
+)
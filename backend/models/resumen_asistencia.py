@@ -0,0 +1,14 @@
+from sqlalchemy import Table, Column, String, Integer, DateTime
+from database import metadata
+
+# Contadores por alumno y materia; se actualizan junto con cada escritura a ASISTENCIA
+resumen_asistencia = Table(
+    "RESUMEN_ASISTENCIA",
+    metadata,
+    Column("matricula", String(10), primary_key=True),
+    Column("claveM", String(10), primary_key=True),
+    Column("asistencias", Integer, nullable=False, default=0),  # presente + retardo
+    Column("retardos", Integer, nullable=False, default=0),
+    Column("total", Integer, nullable=False, default=0),  # Sesiones con registro, incluidas las faltas
+    Column("actualizado", DateTime, nullable=False),
+)
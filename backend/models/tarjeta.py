@@ -0,0 +1,13 @@
+from sqlalchemy import Table, Column, String, Boolean, DateTime, ForeignKey, Index
+from database import metadata
+
+# Tarjetas RFID asignadas a cada alumno
+tarjeta = Table(
+    "TARJETA",
+    metadata,
+    Column("uid", String(20), primary_key=True),
+    Column("matricula", String(10), ForeignKey("ALUMNO.matricula"), nullable=False),
+    Column("activa", Boolean, nullable=False, default=True),  # Las tarjetas dadas de baja se desactivan, no se borran
+    Column("actualizado", DateTime, nullable=False, index=True),  # Marcador para la recarga incremental
+    Index("ix_tarjeta_matricula", "matricula"),  # Tarjetas de un alumno (altas y bajas)
+)
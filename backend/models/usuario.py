@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, String, MetaData
+from sqlalchemy import Table, Column, Integer, String, Index
 from database import metadata
 
 usuario = Table(
@@ -11,6 +11,8 @@ usuario = Table(
     Column("ape2", String(15)),
     Column("idRol", Integer),
     Column("password", String(100)),  # Asegúrate que exista
+    # El login busca por clave y rol juntos
+    Index("ix_usuario_clave_rol", "claveP", "idRol"),
 )
 
 alumno = Table(
@@ -23,4 +25,5 @@ alumno = Table(
     Column("ape2", String(15)),
     Column("numGrupo", Integer),
     Column("password", String(100)),  # Asegúrate que exista
+    Index("ix_alumno_grupo", "numGrupo"),  # Reportes y exportación por grupo
 )
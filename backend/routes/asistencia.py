@@ -0,0 +1,245 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, delete
+from database import async_engine
+from models.asistencia import asistencia
+from models.resumen_asistencia import resumen_asistencia
+from models.usuario import alumno
+from schemas.asistencia import PaseLista
+from utils.cache import cache_respuestas, serializar
+from utils.canal_asistencia import canal_asistencia
+from utils.exportar import FORMATOS, exportar_en_bloques
+from utils.resumen import deltas_resumen, sentencia_resumen
+from utils.tokens import usuario_actual, requiere_rol, verificar_token
+
+router = APIRouter(prefix="/asistencias", tags=["Asistencia"])
+
+ESPERA_TOKEN = 10  # Segundos para que el WebSocket mande su token antes de cerrarlo
+
+COLUMNAS = (
+    asistencia.c.matricula,
+    asistencia.c.claveM,
+    asistencia.c.fecha,
+    asistencia.c.hora,
+    asistencia.c.estado,
+    asistencia.c.origen,
+)
+
+
+@router.post("/pase", dependencies=[Depends(requiere_rol(2, 3))])
+async def guardar_pase(data: PaseLista):
+    """Guarda la lista completa de una sesión en una sola transacción.
+
+    Volver a guardar la misma sesión reemplaza sus registros; las otras
+    sesiones de la materia no se tocan.
+    """
+    matriculas = [r.matricula for r in data.registros]
+    if len(set(matriculas)) != len(matriculas):
+        raise HTTPException(status_code=400, detail="Hay matrículas repetidas en el pase")
+
+    ahora = datetime.now()
+    filas = [
+        {
+            "matricula": r.matricula,
+            "claveM": data.claveM,
+            "fecha": data.fecha,
+            "hora": data.hora,
+            "estado": r.estado,
+            "origen": "manual",
+            "registrado": ahora,
+        }
+        for r in data.registros
+    ]
+
+    sesion = (
+        asistencia.c.claveM == data.claveM,
+        asistencia.c.fecha == data.fecha,
+        asistencia.c.hora == data.hora,
+    )
+    async with async_engine.begin() as conn:
+        # FOR UPDATE: lectura con candado de lo último confirmado. Bloquea hasta el commit
+        # cualquier fila que el drenado RFID quiera meter a esta sesión mientras tanto
+        anteriores = (await conn.execute(
+            select(asistencia.c.id, asistencia.c.matricula, asistencia.c.claveM, asistencia.c.estado)
+            .where(*sesion)
+            .with_for_update()
+        )).all()
+        # Lo que se reemplaza se resta del resumen y lo nuevo se suma, en un solo upsert.
+        # Se borra por id: exactamente las filas que se restaron
+        cambios = deltas_resumen(filas, [f._mapping for f in anteriores])
+        if anteriores:
+            await conn.execute(
+                delete(asistencia)
+                .where(asistencia.c.id.in_([f.id for f in anteriores]))
+                .where(asistencia.c.fecha == data.fecha)
+            )
+        await conn.execute(asistencia.insert(), filas)
+        if cambios:
+            await conn.execute(sentencia_resumen(conn.dialect.name), cambios)
+    cache_respuestas.invalidar(asistencia.name, resumen_asistencia.name)
+
+    return {"message": "Pase guardado", "registros": len(filas)}
+
+
+async def _registros_materia(claveM, fecha):
+    query = (
+        select(*COLUMNAS)
+        .where(asistencia.c.claveM == claveM, asistencia.c.fecha == fecha)
+        .order_by(asistencia.c.hora, asistencia.c.matricula)
+    )
+    async with async_engine.connect() as conn:
+        result = await conn.execute(query)
+        return [dict(fila._mapping) for fila in result]
+
+
+@router.get("/materia/{claveM}", dependencies=[Depends(requiere_rol(2, 3))])
+async def asistencia_materia(claveM: str, fecha: Optional[date] = None):
+    return await _registros_materia(claveM, fecha or date.today())
+
+
+async def _esperar_cierre(websocket: WebSocket):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+async def _autenticar(websocket: WebSocket):
+    """Payload del token que el cliente manda como primer mensaje (`{"token": ...}`), o None."""
+    try:
+        mensaje = await asyncio.wait_for(websocket.receive_json(), ESPERA_TOKEN)
+    except (asyncio.TimeoutError, WebSocketDisconnect, ValueError, KeyError):
+        return None
+    token = mensaje.get("token") if isinstance(mensaje, dict) else None
+    return verificar_token(token) if isinstance(token, str) else None
+
+
+@router.websocket("/en-vivo/{claveM}")
+async def asistencia_en_vivo(websocket: WebSocket, claveM: str, fecha: Optional[date] = None):
+    """Lecturas de la materia en tiempo real para la pantalla del pase de lista.
+
+    El navegador no puede mandar encabezados en un WebSocket, y el token en la
+    URL acabaría en los logs de acceso, así que llega como primer mensaje.
+    Después se manda lo que ya está en ASISTENCIA (`inicial`) y luego lotes
+    de lecturas nuevas (`lecturas`); si el cliente se atrasa tanto que su
+    cola se desborda, se le manda otra vez `inicial`.
+    """
+    await websocket.accept()
+    payload = await _autenticar(websocket)
+    if payload is None or payload.get("rol") not in (2, 3):
+        await websocket.close(code=1008)
+        return
+
+    fecha = fecha or date.today()
+    # Suscribirse antes de leer la base para no perder lo que llegue entre ambas cosas
+    suscripcion = canal_asistencia.suscribir(claveM, fecha)
+    cierre = asyncio.create_task(_esperar_cierre(websocket))
+    try:
+        lote = None
+        while True:
+            if lote is None:
+                mensaje = {"tipo": "inicial", "registros": await _registros_materia(claveM, fecha)}
+            else:
+                mensaje = {"tipo": "lecturas", "registros": lote}
+            await websocket.send_text(serializar(mensaje).decode("utf-8"))
+
+            siguiente = asyncio.ensure_future(suscripcion.siguiente_lote())
+            await asyncio.wait({siguiente, cierre}, return_when=asyncio.FIRST_COMPLETED)
+            if not siguiente.done():
+                siguiente.cancel()
+                break
+            lote = siguiente.result()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        canal_asistencia.cancelar(claveM, fecha, suscripcion)
+        cierre.cancel()
+
+
+@router.get("/alumno/{matricula}")
+async def asistencia_alumno(
+    matricula: str,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    payload=Depends(usuario_actual),
+):
+    # Un alumno solo puede consultar su propia asistencia
+    if payload["rol"] == 1 and payload["sub"] != matricula:
+        raise HTTPException(status_code=403, detail="No tienes permiso para esta acción")
+
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=7)
+    query = (
+        select(*COLUMNAS)
+        .where(asistencia.c.matricula == matricula, asistencia.c.fecha.between(desde, hasta))
+        .order_by(asistencia.c.fecha, asistencia.c.hora)
+    )
+    async with async_engine.connect() as conn:
+        result = await conn.execute(query)
+        return [dict(fila._mapping) for fila in result]
+
+
+@router.get("/alumno/{matricula}/resumen")
+async def resumen_alumno(matricula: str, payload=Depends(usuario_actual)):
+    """Asistencias, retardos y porcentaje por materia, leídos del resumen ya calculado."""
+    if payload["rol"] == 1 and payload["sub"] != matricula:
+        raise HTTPException(status_code=403, detail="No tienes permiso para esta acción")
+
+    query = (
+        select(
+            resumen_asistencia.c.claveM, resumen_asistencia.c.asistencias,
+            resumen_asistencia.c.retardos, resumen_asistencia.c.total,
+        )
+        .where(resumen_asistencia.c.matricula == matricula)
+        .order_by(resumen_asistencia.c.claveM)
+    )
+    async with async_engine.connect() as conn:
+        result = await conn.execute(query)
+        return [
+            {**fila._mapping, "porcentaje": round(100 * fila.asistencias / fila.total, 1) if fila.total else None}
+            for fila in result
+        ]
+
+
+@router.get("/exportar", dependencies=[Depends(requiere_rol(2, 3))])
+async def exportar_asistencia(
+    formato: Literal["csv", "xlsx"] = "xlsx",
+    claveM: Optional[str] = None,
+    numGrupo: Optional[int] = None,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+):
+    """Exporta la asistencia de una materia, un grupo o un periodo completo.
+
+    Las filas salen del cursor por bloques directo al archivo, así que la
+    memoria no depende de cuántos registros tenga la exportación.
+    """
+    query = (
+        select(
+            asistencia.c.fecha, asistencia.c.hora, asistencia.c.claveM, asistencia.c.matricula,
+            alumno.c.nombre, alumno.c.ape1, alumno.c.ape2, alumno.c.numGrupo,
+            asistencia.c.estado, asistencia.c.origen,
+        )
+        .select_from(asistencia.join(alumno, asistencia.c.matricula == alumno.c.matricula))
+        .order_by(asistencia.c.fecha, asistencia.c.hora, asistencia.c.claveM, asistencia.c.matricula)
+    )
+    if claveM is not None:
+        query = query.where(asistencia.c.claveM == claveM)
+    if numGrupo is not None:
+        query = query.where(alumno.c.numGrupo == numGrupo)
+    if desde is not None:
+        query = query.where(asistencia.c.fecha >= desde)
+    if hasta is not None:
+        query = query.where(asistencia.c.fecha <= hasta)
+
+    nombre = "_".join(str(p) for p in ("asistencia", claveM, numGrupo, desde, hasta) if p is not None)
+    return StreamingResponse(
+        exportar_en_bloques(query, formato),
+        media_type=FORMATOS[formato][1],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'},
+    )
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, delete
+from database import async_engine
+from models.horario import horario
+from models.usuario import usuario
+from schemas.horario import SesionHorario
+from utils.cache import cache_respuestas
+from utils.indice_horario import indice_horario
+from utils.tokens import requiere_rol
+
+router = APIRouter(prefix="/horario", tags=["Horario"])
+
+
+@router.get("/")
+async def obtener_horario(request: Request, numGrupo: Optional[int] = None, claveP: Optional[int] = None):
+    query = (
+        select(
+            horario.c.id, horario.c.claveM, horario.c.materia, horario.c.numGrupo, horario.c.aula,
+            horario.c.dia, horario.c.hora_inicio, horario.c.hora_fin, horario.c.claveP,
+            usuario.c.nombre.label("profesor_nombre"), usuario.c.ape1.label("profesor_ape1"),
+        )
+        .select_from(horario.outerjoin(usuario, horario.c.claveP == usuario.c.claveP))
+        .order_by(horario.c.dia, horario.c.hora_inicio)
+    )
+    if numGrupo is not None:
+        query = query.where(horario.c.numGrupo == numGrupo)
+    if claveP is not None:
+        query = query.where(horario.c.claveP == claveP)
+
+    async def calcular():
+        async with async_engine.connect() as conn:
+            result = await conn.execute(query)
+            return [dict(fila._mapping) for fila in result]
+
+    return await cache_respuestas.responder(request, (horario.name, usuario.name), calcular, privada=False)
+
+
+@router.get("/actual")
+async def sesion_actual(aula: str, momento: Optional[datetime] = None):
+    # Misma búsqueda que hace la ingesta RFID para cada lectura
+    momento = momento or datetime.now()
+    sesion = indice_horario.buscar(aula, momento)
+    if sesion is None:
+        raise HTTPException(status_code=404, detail="No hay clase en esa aula a esa hora")
+    return {**sesion._asdict(), "aula": aula, "estado": indice_horario.estado(sesion.hora_inicio, momento)}
+
+
+@router.post("/", status_code=201, dependencies=[Depends(requiere_rol(3))])
+async def agregar_sesion(data: SesionHorario):
+    async with async_engine.begin() as conn:
+        result = await conn.execute(horario.insert().values(**data.model_dump()))
+    cache_respuestas.invalidar(horario.name)
+    await run_in_threadpool(indice_horario.cargar)
+    return {"message": "Sesión agregada", "id": result.inserted_primary_key[0]}
+
+
+@router.delete("/{id}", dependencies=[Depends(requiere_rol(3))])
+async def borrar_sesion(id: int):
+    async with async_engine.begin() as conn:
+        result = await conn.execute(delete(horario).where(horario.c.id == id))
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Sesión no encontrada")
+    cache_respuestas.invalidar(horario.name)
+    await run_in_threadpool(indice_horario.cargar)
+    return {"message": "Sesión eliminada"}
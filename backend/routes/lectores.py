@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from database import async_engine
+from models.lector import lector
+from schemas.rfid import SenalLector
+from utils.indice_horario import indice_horario
+from utils.registro_lectores import registro_lectores
+from utils.tokens import requiere_rol
+
+router = APIRouter(prefix="/lectores", tags=["Lectores"])
+
+
+@router.post("/{id_lector}/senal", status_code=204)
+async def senal_lector(id_lector: str, data: SenalLector):
+    # Solo toca memoria; la base se actualiza por lotes en segundo plano
+    registro_lectores.senal(id_lector, data.firmware, data.cola)
+
+
+async def _incorporar_guardados():
+    # Las señales pudieron llegar a otro worker: se mezcla lo que hay en LECTOR con lo local
+    async with async_engine.connect() as conn:
+        registro_lectores.incorporar((await conn.execute(select(lector))).all())
+
+
+@router.get("/", dependencies=[Depends(requiere_rol(3))])
+async def estado_lectores():
+    await _incorporar_guardados()
+    return registro_lectores.estado()
+
+
+@router.get("/silenciosos", dependencies=[Depends(requiere_rol(3))])
+async def lectores_silenciosos(segundos: Optional[float] = Query(None, gt=0)):
+    """Lectores sin señal reciente, con la clase que se está perdiendo en su aula si la hay."""
+    await _incorporar_guardados()
+    ahora = datetime.now()
+    caidos = registro_lectores.silenciosos(segundos, ahora)
+    for caido in caidos:
+        sesion = indice_horario.buscar(caido["lector"], ahora)
+        caido["clase_actual"] = sesion.claveM if sesion else None
+    return caidos
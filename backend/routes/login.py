@@ -1,57 +1,97 @@
+import logging
+
 from fastapi import APIRouter, HTTPException
-from sqlalchemy import select
-from database import engine
+from sqlalchemy import select, update, lambda_stmt
+from database import async_engine
 from models.usuario import usuario, alumno
 from schemas.login import LoginRequest
+from utils.security import (
+    verificar_password, necesita_rehash, hash_password_async, cache_verificaciones, REHASH_AL_LOGIN
+)
 from models.materia_alumno import materia_alumno 
+from utils.tokens import crear_token
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/login", tags=["Login"])
 
+# Solo las columnas que usa la respuesta (y el hash para verificar)
+COLUMNAS_ALUMNO = (alumno.c.matricula, alumno.c.nombre, alumno.c.ape1, alumno.c.ape2, alumno.c.password)
+COLUMNAS_USUARIO = (usuario.c.claveP, usuario.c.nombre, usuario.c.password)
+
+
+# lambda_stmt construye el select una sola vez y lo reutiliza en cada llamada: los
+# valores del closure se convierten en parámetros y la compilación queda en el
+# compiled cache del motor, así que cada petición solo paga la búsqueda en caché
+def consulta_login_alumno(matricula):
+    return lambda_stmt(lambda: select(*COLUMNAS_ALUMNO).where(alumno.c.matricula == matricula))
+
+
+def consulta_login_usuario(claveP, rol):
+    return lambda_stmt(
+        lambda: select(*COLUMNAS_USUARIO).where(usuario.c.claveP == claveP, usuario.c.idRol == rol)
+    )
+
+
+async def _rehash_si_hace_falta(conn, tabla, condicion, clave_usuario, password, guardado):
+    # Opcional (PASSWORD_REHASH=1): migra texto plano o costo viejo al hash actual
+    if REHASH_AL_LOGIN and necesita_rehash(guardado):
+        nuevo = await hash_password_async(password)
+        await conn.execute(update(tabla).where(condicion).values(password=nuevo))
+        await conn.commit()
+        # El siguiente login ya verifica contra el hash nuevo; se deja en el caché
+        cache_verificaciones.agregar(cache_verificaciones.clave(clave_usuario, nuevo, password))
+
+
 @router.post("/")
-def login_user(data: LoginRequest):
-    try:
-        with engine.connect() as conn:
-            print("Datos recibidos:", data)
-
-            if data.rol == 1:  # Alumno
-                query = select(alumno).where(alumno.c.matricula == data.usuario)
-                result = conn.execute(query).fetchone()
-
-                if not result:
-                    raise HTTPException(status_code=404, detail="Alumno no encontrado")
-                if result.password != data.password:
-                    raise HTTPException(status_code=401, detail="Contraseña incorrecta")
-
-                return {
-                    "message": "Login exitoso",
-                    "matricula": result.matricula,
-                    "nombre": result.nombre,
-                    "ape1": result.ape1,
-                    "ape2": result.ape2,
-                    "rol": data.rol
-                }
-
-            elif data.rol in [2, 3]:  # Profesor o Admin
-                query = select(usuario).where(
-                    usuario.c.claveP == data.usuario,
-                    usuario.c.idRol == data.rol
-                )
-                result = conn.execute(query).fetchone()
-
-                if not result:
-                    raise HTTPException(status_code=404, detail="Usuario no encontrado")
-                if result.password != data.password:
-                    raise HTTPException(status_code=401, detail="Contraseña incorrecta")
-
-                return {
-                    "message": "Login exitoso",
-                    "claveP": str(data.usuario),
-                    "nombre": result.nombre,
-                    "rol": data.rol
-                }
-            else:
-                raise HTTPException(status_code=400, detail="Rol inválido")
-
-    except Exception as e:
-        print("ERROR en login:", e)
-        raise HTTPException(status_code=500, detail="Error interno del servidor")
+async def login_user(data: LoginRequest):
+    # Nunca se registra la contraseña
+    logger.debug("Intento de login", extra={"rol": data.rol, "usuario": data.usuario})
+    if data.rol not in (1, 2, 3):
+        raise HTTPException(status_code=400, detail="Rol inválido")
+
+    async with async_engine.connect() as conn:
+
+        if data.rol == 1:  # Alumno
+            query = consulta_login_alumno(data.usuario)
+            result = (await conn.execute(query)).fetchone()
+
+            if not result:
+                raise HTTPException(status_code=404, detail="Alumno no encontrado")
+            clave_usuario = f"1:{result.matricula}"
+            if not await verificar_password(clave_usuario, data.password, result.password):
+                raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+            await _rehash_si_hace_falta(
+                conn, alumno, alumno.c.matricula == result.matricula, clave_usuario, data.password, result.password
+            )
+
+            return {
+                "message": "Login exitoso",
+                "matricula": result.matricula,
+                "nombre": result.nombre,
+                "ape1": result.ape1,
+                "ape2": result.ape2,
+                "rol": data.rol,
+                "token": crear_token(result.matricula, data.rol)
+            }
+
+        else:  # Profesor (2) o Admin (3)
+            query = consulta_login_usuario(data.usuario, data.rol)
+            result = (await conn.execute(query)).fetchone()
+
+            if not result:
+                raise HTTPException(status_code=404, detail="Usuario no encontrado")
+            clave_usuario = f"{data.rol}:{result.claveP}"
+            if not await verificar_password(clave_usuario, data.password, result.password):
+                raise HTTPException(status_code=401, detail="Contraseña incorrecta")
+            await _rehash_si_hace_falta(
+                conn, usuario, usuario.c.claveP == result.claveP, clave_usuario, data.password, result.password
+            )
+
+            return {
+                "message": "Login exitoso",
+                "claveP": str(data.usuario),
+                "nombre": result.nombre,
+                "rol": data.rol,
+                "token": crear_token(result.claveP, data.rol)
+            }
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from database import async_engine
+from models.materia_alumno import materia_alumno
+from models.usuario import alumno
+from utils.cache import cache_respuestas
+from utils.tokens import requiere_rol, usuario_actual
+
+router = APIRouter(prefix="/materias", tags=["Materias"])
+
+def consulta_lista(claveM):
+    # Un solo join y solo las columnas que muestra el pase de lista
+    return (
+        select(alumno.c.matricula, alumno.c.nombre, alumno.c.ape1, alumno.c.ape2, alumno.c.numGrupo)
+        .select_from(materia_alumno.join(alumno, materia_alumno.c.matricula == alumno.c.matricula))
+        .where(materia_alumno.c.claveM == claveM)
+        .order_by(alumno.c.ape1, alumno.c.ape2, alumno.c.nombre)
+    )
+
+
+@router.get("/{claveM}/alumnos", dependencies=[Depends(requiere_rol(2, 3))])
+async def lista_alumnos(request: Request, claveM: str):
+    async def calcular():
+        # Una lista cabe de sobra en memoria; el cache guarda los bytes ya serializados
+        async with async_engine.connect() as conn:
+            return [dict(fila._mapping) for fila in await conn.execute(consulta_lista(claveM))]
+
+    return await cache_respuestas.responder(request, (materia_alumno.name, alumno.name), calcular)
+
+
+@router.get("/alumno/{matricula}")
+async def materias_alumno(request: Request, matricula: str, payload=Depends(usuario_actual)):
+    # Usa el índice por matrícula de MATERIA_ALUMNO
+    if payload["rol"] == 1 and payload["sub"] != matricula:
+        raise HTTPException(status_code=403, detail="No tienes permiso para esta acción")
+    query = select(materia_alumno.c.claveM).where(materia_alumno.c.matricula == matricula)
+
+    async def calcular():
+        async with async_engine.connect() as conn:
+            return (await conn.execute(query)).scalars().all()
+
+    return await cache_respuestas.responder(request, (materia_alumno.name,), calcular)
@@ -0,0 +1,32 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+from database import estadisticas_consultas
+from utils.metricas import recolectar, renderizar_texto
+from utils.tokens import requiere_rol
+
+router = APIRouter(tags=["Métricas"])
+
+
+@router.get("/metrics")
+async def metricas(formato: Literal["texto", "json"] = "texto"):
+    # Texto de Prometheus para el scraper; json para revisarlo a mano
+    if formato == "json":
+        return recolectar()
+    return PlainTextResponse(renderizar_texto(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/metrics/consultas", dependencies=[Depends(requiere_rol(3))])
+async def consultas_costosas(
+    top: int = Query(20, ge=1, le=500),
+    orden: Literal["total", "max", "llamadas", "filas"] = "total",
+):
+    """Las huellas de consulta que más pesan, según `orden`."""
+    return estadisticas_consultas.top(top, orden)
+
+
+@router.delete("/metrics/consultas", status_code=204, dependencies=[Depends(requiere_rol(3))])
+async def reiniciar_consultas():
+    # Para medir desde cero después de un cambio (un índice nuevo, por ejemplo)
+    estadisticas_consultas.reiniciar()
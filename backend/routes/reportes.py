@@ -0,0 +1,95 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy import and_, case, func, select
+from database import async_engine
+from models.asistencia import asistencia
+from models.horario import horario
+from models.materia_alumno import materia_alumno
+from models.usuario import alumno, usuario
+from utils.cache import cache_respuestas
+from utils.tokens import requiere_rol
+
+router = APIRouter(prefix="/reportes", tags=["Reportes"])
+
+
+def consulta_grupo(numGrupo, desde, hasta):
+    """Una fila por alumno y materia del grupo con sus conteos, en una sola consulta.
+
+    Las materias salen de MATERIA_ALUMNO, así que también aparecen las que
+    todavía no tienen registros. Sin paginar: la ruta aplica LIMIT/OFFSET y
+    cuenta el total aparte sobre la misma consulta.
+    """
+    # Nombre de la materia y profesor del grupo, una fila por materia
+    materias = (
+        select(
+            horario.c.claveM,
+            func.max(horario.c.materia).label("materia"),
+            func.max(horario.c.claveP).label("claveP"),
+        )
+        .where(horario.c.numGrupo == numGrupo)
+        .group_by(horario.c.claveM)
+        .subquery()
+    )
+
+    en_rango = [asistencia.c.matricula == alumno.c.matricula, asistencia.c.claveM == materia_alumno.c.claveM]
+    if desde is not None:
+        en_rango.append(asistencia.c.fecha >= desde)
+    if hasta is not None:
+        en_rango.append(asistencia.c.fecha <= hasta)
+
+    def contar(estado):
+        return func.count(case((asistencia.c.estado == estado, 1)))
+
+    return (
+        select(
+            alumno.c.matricula, alumno.c.nombre, alumno.c.ape1, alumno.c.ape2,
+            materia_alumno.c.claveM,
+            func.max(materias.c.materia).label("materia"),
+            func.max(usuario.c.nombre).label("profesor_nombre"),
+            func.max(usuario.c.ape1).label("profesor_ape1"),
+            contar("presente").label("presentes"),
+            contar("retardo").label("retardos"),
+            contar("ausente").label("ausentes"),
+            func.count(asistencia.c.id).label("total"),
+        )
+        .select_from(
+            alumno.join(materia_alumno, materia_alumno.c.matricula == alumno.c.matricula)
+            .outerjoin(asistencia, and_(*en_rango))
+            .outerjoin(materias, materias.c.claveM == materia_alumno.c.claveM)
+            .outerjoin(usuario, usuario.c.claveP == materias.c.claveP)
+        )
+        .where(alumno.c.numGrupo == numGrupo)
+        .group_by(alumno.c.matricula, alumno.c.nombre, alumno.c.ape1, alumno.c.ape2, materia_alumno.c.claveM)
+        .order_by(alumno.c.ape1, alumno.c.ape2, alumno.c.nombre, alumno.c.matricula, materia_alumno.c.claveM)
+    )
+
+
+@router.get("/grupo/{numGrupo}", dependencies=[Depends(requiere_rol(2, 3))])
+async def reporte_grupo(
+    request: Request,
+    numGrupo: int,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    pagina: int = Query(1, ge=1),
+    por_pagina: int = Query(200, ge=1, le=1000),
+):
+    async def calcular():
+        consulta = consulta_grupo(numGrupo, desde, hasta)
+        async with async_engine.connect() as conn:
+            # Sobre la consulta agrupada completa: una página vacía no pierde el total
+            total = await conn.scalar(select(func.count()).select_from(consulta.order_by(None).subquery()))
+            result = await conn.execute(consulta.limit(por_pagina).offset((pagina - 1) * por_pagina))
+            filas = [dict(fila._mapping) for fila in result]
+
+        return {
+            "numGrupo": numGrupo,
+            "pagina": pagina,
+            "por_pagina": por_pagina,
+            "total": total,
+            "filas": filas,
+        }
+
+    tablas = (alumno.name, materia_alumno.name, asistencia.name, horario.name, usuario.name)
+    return await cache_respuestas.responder(request, tablas, calcular)
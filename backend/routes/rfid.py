@@ -0,0 +1,103 @@
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Path
+from sqlalchemy import select, update
+from database import async_engine
+from models.tarjeta import tarjeta
+from models.usuario import alumno
+from schemas.rfid import LecturaRFID, LoteLecturas, AsignacionTarjeta
+from utils.spool_rfid import spool_lecturas
+from utils.indice_tarjetas import indice_tarjetas
+from utils.indice_horario import indice_horario
+from utils.dedup_rfid import filtro_repetidas
+from utils.registro_lectores import registro_lectores
+from utils.canal_asistencia import canal_asistencia
+from utils.tokens import requiere_rol
+
+router = APIRouter(prefix="/rfid", tags=["RFID"])
+
+
+def _hora_local(momento):
+    # Las columnas DateTime se guardan sin zona horaria
+    if momento.tzinfo is not None:
+        return momento.astimezone().replace(tzinfo=None)
+    return momento
+
+
+def _encolar(lecturas):
+    ahora = datetime.now()
+    # Una lectura también cuenta como señal de vida de su lector
+    for id_lector in {lectura.lector for lectura in lecturas}:
+        registro_lectores.senal(id_lector, momento=ahora)
+
+    filas = []
+    for lectura in lecturas:
+        momento = _hora_local(lectura.momento) if lectura.momento else ahora
+        # Las repetidas por rebote nunca llegan al buffer ni a la base
+        if filtro_repetidas.es_repetida(lectura.uid, lectura.lector, momento.timestamp()):
+            continue
+        sesion = indice_horario.buscar(lectura.lector, momento)
+        filas.append({
+            "uid": lectura.uid,
+            "lector": lectura.lector,
+            "matricula": indice_tarjetas.resolver(lectura.uid),
+            "claveM": sesion.claveM if sesion else None,
+            "sesion": sesion.hora_inicio if sesion else None,
+            "momento": momento,
+            "recibido": ahora,
+        })
+
+    # Se confirma en cuanto la lectura está en el spool local; la base se actualiza después
+    if filas and not spool_lecturas.agregar(filas):
+        for fila in filas:
+            filtro_repetidas.olvidar(fila["uid"], fila["lector"])
+        raise HTTPException(status_code=503, detail="Spool de lecturas lleno, reintenta más tarde")
+
+    for fila in filas:
+        if fila["matricula"] is not None and fila["claveM"] is not None:
+            canal_asistencia.publicar(fila["claveM"], fila["momento"].date(), {
+                "matricula": fila["matricula"],
+                "hora": fila["sesion"],
+                "estado": indice_horario.estado(fila["sesion"], fila["momento"]),
+                "origen": "rfid",
+                "momento": fila["momento"],
+            })
+
+    return {"message": "Lecturas recibidas", "aceptadas": len(filas), "repetidas": len(lecturas) - len(filas)}
+
+
+@router.post("/lecturas", status_code=202)
+async def registrar_lectura(data: LecturaRFID):
+    return _encolar([data])
+
+
+@router.post("/lecturas/lote", status_code=202)
+async def registrar_lote(data: LoteLecturas):
+    return _encolar(data.lecturas)
+
+
+@router.put("/tarjetas/{uid}", dependencies=[Depends(requiere_rol(3))])  # Solo admin
+async def asignar_tarjeta(data: AsignacionTarjeta, uid: str = Path(min_length=1, max_length=20)):
+    ahora = datetime.now()
+    async with async_engine.begin() as conn:
+        existe = (await conn.execute(select(alumno.c.matricula).where(alumno.c.matricula == data.matricula))).first()
+        if not existe:
+            raise HTTPException(status_code=404, detail="Alumno no encontrado")
+
+        valores = {"matricula": data.matricula, "activa": data.activa, "actualizado": ahora}
+        result = await conn.execute(update(tarjeta).where(tarjeta.c.uid == uid).values(**valores))
+        if result.rowcount == 0:
+            await conn.execute(tarjeta.insert().values(uid=uid, **valores))
+
+    # El resto de los procesos lo verán en su siguiente recarga incremental
+    indice_tarjetas.aplicar(uid, data.matricula, data.activa)
+    return {"message": "Tarjeta asignada", "uid": uid, "matricula": data.matricula, "activa": data.activa}
+
+
+@router.get("/metricas")
+async def metricas_rfid():
+    return {
+        "spool": spool_lecturas.metricas(),
+        "indice_tarjetas": indice_tarjetas.metricas(),
+        "rebote": filtro_repetidas.metricas(),
+    }
@@ -0,0 +1,16 @@
+from datetime import date, time
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+EstadoAsistencia = Literal["presente", "ausente", "retardo"]
+
+class RegistroAsistencia(BaseModel):
+    matricula: str = Field(min_length=1, max_length=10)
+    estado: EstadoAsistencia
+
+class PaseLista(BaseModel):
+    claveM: str = Field(min_length=1, max_length=10)
+    fecha: date
+    hora: time  # Hora de inicio de la sesión
+    registros: list[RegistroAsistencia] = Field(min_length=1, max_length=500)
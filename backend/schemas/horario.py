@@ -0,0 +1,20 @@
+from datetime import time
+from typing import Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+class SesionHorario(BaseModel):
+    claveM: str = Field(min_length=1, max_length=10)
+    materia: str = Field(min_length=1, max_length=60)
+    numGrupo: int
+    claveP: Optional[int] = None
+    aula: str = Field(min_length=1, max_length=20)
+    dia: int = Field(ge=0, le=6)  # 0 = lunes
+    hora_inicio: time
+    hora_fin: time
+
+    @model_validator(mode="after")
+    def validar_horas(self):
+        if self.hora_fin <= self.hora_inicio:
+            raise ValueError("hora_fin debe ser posterior a hora_inicio")
+        return self
@@ -0,0 +1,38 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+# Desfase aceptado entre el reloj del lector y el del servidor. Hacia atrás es amplio
+# porque un lector sin red guarda lecturas y las manda al volver
+ATRASO_MAX = timedelta(hours=float(os.getenv("RFID_ATRASO_MAX_H", "72")))
+ADELANTO_MAX = timedelta(seconds=float(os.getenv("RFID_ADELANTO_MAX_S", "300")))
+
+class LecturaRFID(BaseModel):
+    uid: str = Field(min_length=1, max_length=20)
+    lector: str = Field(min_length=1, max_length=20)
+    momento: Optional[datetime] = None  # Si el lector no lo manda se usa la hora del servidor
+
+    @field_validator("momento")
+    @classmethod
+    def validar_momento(cls, momento):
+        if momento is None:
+            return momento
+        # Sin zona horaria se toma como hora local, igual que al guardarla
+        local = momento.astimezone().replace(tzinfo=None) if momento.tzinfo is not None else momento
+        ahora = datetime.now()
+        if not ahora - ATRASO_MAX <= local <= ahora + ADELANTO_MAX:
+            raise ValueError("momento está demasiado lejos de la hora del servidor")
+        return momento
+
+class LoteLecturas(BaseModel):
+    lecturas: list[LecturaRFID] = Field(min_length=1, max_length=5000)
+
+class AsignacionTarjeta(BaseModel):
+    matricula: str = Field(min_length=1, max_length=10)
+    activa: bool = True
+
+class SenalLector(BaseModel):
+    firmware: Optional[str] = Field(default=None, max_length=40)
+    cola: int = Field(default=0, ge=0)  # Lecturas que el lector todavía no ha podido mandar
@@ -0,0 +1,23 @@
+"""Crea las particiones mensuales que falten en ASISTENCIA y archiva las viejas.
+
+La app lo hace sola cada PARTICIONES_INTERVALO segundos; esto es para
+correrlo a mano o desde cron. Solo hace algo en MySQL. Desde backend:
+
+    python -m scripts.particiones
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.particiones import mantenimiento_particiones  # noqa: E402
+
+
+def main():
+    cambios = mantenimiento_particiones.revisar()
+    print(f"creadas: {', '.join(cambios['creadas']) or '-'}")
+    print(f"archivadas: {', '.join(cambios['archivadas']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
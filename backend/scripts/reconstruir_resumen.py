@@ -0,0 +1,27 @@
+"""Recalcula RESUMEN_ASISTENCIA desde ASISTENCIA.
+
+Para reparar los contadores si se editó ASISTENCIA a mano. Correr desde backend:
+
+    python -m scripts.reconstruir_resumen
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database import engine, metadata  # noqa: E402
+from models.resumen_asistencia import resumen_asistencia  # noqa: E402
+from utils.resumen import reconstruir_resumen  # noqa: E402
+
+
+def main():
+    metadata.create_all(engine, tables=[resumen_asistencia])
+    inicio = time.perf_counter()
+    with engine.begin() as conn:
+        renglones = reconstruir_resumen(conn)
+    print(f"{renglones} renglones en RESUMEN_ASISTENCIA ({time.perf_counter() - inicio:.2f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, time as hora
+
+from fastapi import Request, Response
+
+CACHE_TTL = float(os.getenv("CACHE_TTL", "60"))  # segundos
+CACHE_ENTRADAS = int(os.getenv("CACHE_ENTRADAS", "1000"))
+
+
+def _a_json(valor):
+    # Fechas y horas en ISO 8601, igual que las respuestas normales de FastAPI
+    if isinstance(valor, (date, hora)):
+        return valor.isoformat()
+    return str(valor)
+
+
+def serializar(contenido):
+    return json.dumps(contenido, ensure_ascii=False, separators=(",", ":"), default=_a_json).encode("utf-8")
+
+
+def calcular_etag(cuerpo):
+    # ETag fuerte: el mismo hash solo sale de los mismos bytes
+    return '"' + hashlib.sha256(cuerpo).hexdigest()[:32] + '"'
+
+
+def coincide_etag(request: Request, etag):
+    encabezado = request.headers.get("if-none-match")
+    if not encabezado:
+        return False
+    etiquetas = [e.strip().removeprefix("W/") for e in encabezado.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+
+def respuesta_json(request: Request, cuerpo, etag=None, privada=True):
+    """Respuesta con ETag; si el cliente ya tiene esa versión regresa 304 sin cuerpo."""
+    etag = etag or calcular_etag(cuerpo)
+    # no-cache: el navegador/proxy puede guardarla pero revalida cada vez con If-None-Match
+    headers = {"ETag": etag, "Cache-Control": ("private" if privada else "public") + ", no-cache"}
+    if coincide_etag(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cuerpo, media_type="application/json", headers=headers)
+
+
+class CacheRespuestas:
+    """Cache en memoria de respuestas de lectura, con TTL y LRU.
+
+    Cada entrada recuerda la versión de las tablas de las que salió. Quien
+    escribe en una tabla llama `invalidar(nombre)` y sube su versión, así que
+    las entradas viejas dejan de coincidir sin tener que buscarlas. El TTL
+    acota lo que tarda en verse un cambio hecho por otro proceso.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, entradas=CACHE_ENTRADAS):
+        self.ttl = ttl
+        self.entradas = entradas
+        self._datos = OrderedDict()
+        self._versiones = {}
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.no_modificadas = 0
+
+    def invalidar(self, *tablas):
+        with self._lock:
+            for tabla in tablas:
+                self._versiones[tabla] = self._versiones.get(tabla, 0) + 1
+
+    def _version(self, tablas):
+        return tuple(self._versiones.get(t, 0) for t in tablas)
+
+    def _obtener(self, clave, version):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] != version or entrada[1] < time.monotonic():
+                return None
+            self._datos.move_to_end(clave)
+            return entrada[2], entrada[3]
+
+    def _guardar(self, clave, version, cuerpo, etag):
+        with self._lock:
+            self._datos[clave] = (version, time.monotonic() + self.ttl, cuerpo, etag)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.entradas:
+                self._datos.popitem(last=False)
+
+    async def responder(self, request: Request, tablas, calcular, privada=True):
+        """Regresa la respuesta de la ruta desde el cache o llamando `calcular()`.
+
+        La clave es la ruta con sus parámetros. `tablas` son los nombres de las
+        tablas que lee la consulta y `calcular` una corrutina que regresa el
+        contenido (o los bytes JSON ya armados).
+        """
+        clave = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+        with self._lock:
+            version = self._version(tablas)
+        guardada = self._obtener(clave, version)
+        if guardada is not None:
+            self.aciertos += 1
+            cuerpo, etag = guardada
+        else:
+            self.fallos += 1
+            contenido = await calcular()
+            cuerpo = contenido if isinstance(contenido, bytes) else serializar(contenido)
+            etag = calcular_etag(cuerpo)
+            # Si alguien escribió mientras se calculaba, la entrada nace vieja y no se usa
+            self._guardar(clave, version, cuerpo, etag)
+
+        respuesta = respuesta_json(request, cuerpo, etag, privada)
+        if respuesta.status_code == 304:
+            self.no_modificadas += 1
+        return respuesta
+
+    def metricas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+            "no_modificadas": self.no_modificadas,
+        }
+
+
+cache_respuestas = CacheRespuestas()
@@ -0,0 +1,96 @@
+import asyncio
+import os
+
+VENTANA = float(os.getenv("WS_VENTANA_MS", "250")) / 1000  # Espera para juntar cambios en un mensaje
+CAPACIDAD = int(os.getenv("WS_CAPACIDAD", "500"))  # Cambios pendientes por suscriptor
+
+
+class Suscripcion:
+    """Cola acotada de un suscriptor.
+
+    Los cambios se juntan por matrícula: si un alumno aparece dos veces antes
+    de que el navegador lea, solo se manda el primero, igual que en
+    ASISTENCIA. Si se juntan más de `capacidad` cambios distintos la
+    suscripción se marca desbordada y el cliente debe recargar la lista
+    completa; publicar nunca espera.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD):
+        self.capacidad = capacidad
+        self._pendientes = {}
+        self._hay_cambios = asyncio.Event()
+        self.desbordada = False
+
+    def poner(self, evento):
+        if self.desbordada:
+            return False
+        if evento["matricula"] not in self._pendientes and len(self._pendientes) >= self.capacidad:
+            self._pendientes.clear()
+            self.desbordada = True
+        else:
+            self._pendientes.setdefault(evento["matricula"], evento)
+        self._hay_cambios.set()
+        return not self.desbordada
+
+    async def siguiente_lote(self, ventana=VENTANA):
+        """Espera cambios, deja pasar `ventana` para juntar más y regresa el lote."""
+        await self._hay_cambios.wait()
+        await asyncio.sleep(ventana)
+        self._hay_cambios.clear()
+        if self.desbordada:
+            self.desbordada = False
+            return None
+        lote = list(self._pendientes.values())
+        self._pendientes = {}
+        return lote
+
+
+class CanalAsistencia:
+    """Pub/sub en proceso de las lecturas por sesión de clase (claveM, fecha).
+
+    La ingesta publica desde el event loop; cada publicación solo recorre los
+    suscriptores de esa sesión y deja el evento en su cola, así que un
+    navegador lento no frena la ingesta.
+    """
+
+    def __init__(self):
+        self._temas = {}  # (claveM, fecha) -> set de Suscripcion
+        self.publicados = 0
+        self.entregados = 0
+        self.desbordes = 0
+
+    def suscribir(self, claveM, fecha):
+        suscripcion = Suscripcion()
+        self._temas.setdefault((claveM, fecha), set()).add(suscripcion)
+        return suscripcion
+
+    def cancelar(self, claveM, fecha, suscripcion):
+        suscriptores = self._temas.get((claveM, fecha))
+        if suscriptores is None:
+            return
+        suscriptores.discard(suscripcion)
+        if not suscriptores:
+            del self._temas[(claveM, fecha)]
+
+    def publicar(self, claveM, fecha, evento):
+        suscriptores = self._temas.get((claveM, fecha))
+        if not suscriptores:
+            return
+        self.publicados += 1
+        for suscripcion in suscriptores:
+            if suscripcion.poner(evento):
+                self.entregados += 1
+            else:
+                self.desbordes += 1
+
+    def metricas(self):
+        return {
+            "sesiones": len(self._temas),
+            "suscriptores": sum(len(s) for s in self._temas.values()),
+            "publicados": self.publicados,
+            "entregados": self.entregados,
+            "desbordes": self.desbordes,
+        }
+
+
+canal_asistencia = CanalAsistencia()
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from database import engine
+from models.asistencia import asistencia
+from models.horario import horario
+from models.materia_alumno import materia_alumno
+from models.resumen_asistencia import resumen_asistencia
+from models.usuario import alumno
+from utils.cache import cache_respuestas
+from utils.resumen import deltas_resumen, sentencia_resumen
+
+logger = logging.getLogger(__name__)
+
+INTERVALO = float(os.getenv("CIERRE_INTERVALO", "300"))  # segundos
+MARGEN = int(os.getenv("CIERRE_MARGEN_MIN", "15"))  # Minutos después de hora_fin antes de cerrar
+DIAS_ATRAS = int(os.getenv("CIERRE_DIAS_ATRAS", "1"))  # Días anteriores que se revisan además de hoy
+
+ORIGEN_CIERRE = "cierre"  # Ausencias escritas al cerrar la sesión; una lectura RFID las reemplaza
+
+
+class CierreSesiones:
+    """Marca `ausente` a los inscritos que no pasaron en las sesiones ya terminadas.
+
+    La ingesta RFID solo escribe a quien pasó la tarjeta, así que sin este
+    paso RESUMEN_ASISTENCIA no contaría las faltas. Una sesión se cierra
+    `margen` minutos después de su hora_fin y solo si se impartió, es decir,
+    si tiene al menos un registro (un día feriado no deja faltas). Todo va por
+    grupo: una materia puede darse a la misma hora a varios grupos, y solo
+    reciben faltas los inscritos en MATERIA_ALUMNO del grupo que tuvo clase.
+    """
+
+    def __init__(self, intervalo=INTERVALO, margen=MARGEN, dias_atras=DIAS_ATRAS):
+        self.intervalo = intervalo
+        self.margen = timedelta(minutes=margen)
+        self.dias_atras = dias_atras
+        self._cerradas = set()  # (claveM, fecha, hora, numGrupo) ya revisadas por este proceso
+        self._detener = threading.Event()
+        self._hilo = None
+
+        self.sesiones_cerradas = 0
+        self.ausencias = 0
+        self.ultima_revision = None
+
+    def cerrar(self, ahora=None):
+        """Escribe las ausencias de las sesiones terminadas. Regresa cuántas escribió."""
+        ahora = ahora or datetime.now()
+        limite = ahora - self.margen
+        desde = ahora.date() - timedelta(days=self.dias_atras)
+        self._cerradas = {s for s in self._cerradas if s[1] >= desde}
+
+        with engine.begin() as conn:
+            fines = {}
+            for fila in conn.execute(select(
+                horario.c.claveM, horario.c.numGrupo, horario.c.dia, horario.c.hora_inicio, horario.c.hora_fin,
+            )):
+                fines[(fila.claveM, fila.numGrupo, fila.dia, fila.hora_inicio)] = fila.hora_fin
+
+            # Primero solo qué sesiones se impartieron y a qué grupo: una fila por sesión y grupo
+            impartidas = conn.execute(
+                select(asistencia.c.claveM, asistencia.c.fecha, asistencia.c.hora, alumno.c.numGrupo)
+                .distinct()
+                .join(alumno, alumno.c.matricula == asistencia.c.matricula)
+                .where(asistencia.c.fecha >= desde)
+            ).all()
+
+            # Terminadas y que este proceso no ha cerrado: (claveM, fecha, hora, numGrupo)
+            pendientes = set()
+            for sesion in impartidas:
+                sesion = tuple(sesion)
+                claveM, fecha, hora, numGrupo = sesion
+                fin = fines.get((claveM, numGrupo, fecha.weekday(), hora))
+                if sesion not in self._cerradas and fin is not None and datetime.combine(fecha, fin) <= limite:
+                    pendientes.add(sesion)
+            if not pendientes:
+                return 0
+
+            # Las matrículas solo de esas sesiones
+            claves = {(s[0], s[1], s[2]) for s in pendientes}
+            presentes = {}
+            for fila in conn.execute(
+                select(asistencia.c.claveM, asistencia.c.fecha, asistencia.c.hora, asistencia.c.matricula)
+                .where(tuple_(asistencia.c.claveM, asistencia.c.fecha, asistencia.c.hora).in_(claves))
+                .where(asistencia.c.fecha.in_({c[1] for c in claves}))
+            ):
+                presentes.setdefault((fila.claveM, fila.fecha, fila.hora), set()).add(fila.matricula)
+
+            inscritos = {}
+            for fila in conn.execute(
+                select(materia_alumno.c.claveM, alumno.c.numGrupo, alumno.c.matricula)
+                .join(alumno, alumno.c.matricula == materia_alumno.c.matricula)
+                .where(tuple_(materia_alumno.c.claveM, alumno.c.numGrupo).in_({(s[0], s[3]) for s in pendientes}))
+            ):
+                inscritos.setdefault((fila.claveM, fila.numGrupo), []).append(fila.matricula)
+
+            filas = [
+                {
+                    "matricula": matricula,
+                    "claveM": claveM,
+                    "fecha": fecha,
+                    "hora": hora,
+                    "estado": "ausente",
+                    "origen": ORIGEN_CIERRE,
+                    "registrado": ahora,
+                }
+                for claveM, fecha, hora, numGrupo in pendientes
+                for matricula in inscritos.get((claveM, numGrupo), ())
+                if matricula not in presentes.get((claveM, fecha, hora), ())
+            ]
+            if filas:
+                conn.execute(asistencia.insert(), filas)
+                conn.execute(sentencia_resumen(conn.dialect.name), deltas_resumen(filas))
+
+        if filas:
+            cache_respuestas.invalidar(asistencia.name, resumen_asistencia.name)
+        self._cerradas.update(pendientes)
+        self.sesiones_cerradas += len(pendientes)
+        self.ausencias += len(filas)
+        self.ultima_revision = ahora
+        return len(filas)
+
+    def metricas(self):
+        return {
+            "sesiones_cerradas": self.sesiones_cerradas,
+            "ausencias": self.ausencias,
+            "ultima_revision": self.ultima_revision.isoformat() if self.ultima_revision else None,
+        }
+
+    def iniciar(self):
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="cierre-sesiones", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join()
+        self._hilo = None
+
+    def _ciclo(self):
+        while True:
+            try:
+                self.cerrar()
+            except IntegrityError:
+                # Otro worker cerró las mismas sesiones primero; la siguiente vuelta ya las ve
+                logger.info("Cierre de sesiones hecho por otro proceso, se reintenta en la siguiente vuelta")
+            except Exception:
+                logger.exception("No se pudieron cerrar las sesiones terminadas")
+            if self._detener.wait(self.intervalo):
+                return
+
+
+cierre_sesiones = CierreSesiones()
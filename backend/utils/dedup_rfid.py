@@ -0,0 +1,82 @@
+import os
+import threading
+import time
+
+VENTANA_REBOTE = float(os.getenv("RFID_VENTANA_REBOTE", "10"))  # segundos
+CAPACIDAD_CUBETA = int(os.getenv("RFID_CAPACIDAD_REBOTE", "200000"))
+
+
+class FiltroRepetidas:
+    """Descarta lecturas repetidas de la misma tarjeta en el mismo lector.
+
+    Guarda la última vez que se vio cada (uid, lector) en dos cubetas de
+    tiempo: cuando la cubeta actual cumple una ventana pasa a ser la anterior
+    y la anterior se tira completa. Así la memoria queda acotada a dos
+    ventanas de lecturas sin recorrer entradas viejas una por una.
+
+    Las cubetas rotan con el reloj monotónico del servidor; la hora que manda
+    el lector solo se compara contra lecturas del mismo lector, así que un
+    lector con el reloj mal no detiene la rotación de los demás.
+
+    Una repetida también renueva su hora: mientras el alumno deja la tarjeta
+    sobre la antena, el lector no genera lecturas nuevas.
+    """
+
+    def __init__(self, ventana=VENTANA_REBOTE, capacidad=CAPACIDAD_CUBETA):
+        self.ventana = ventana
+        self.capacidad = capacidad
+        self._actual = {}
+        self._anterior = {}
+        self._inicio_cubeta = None
+        self._lock = threading.Lock()
+
+        self.recibidas = 0
+        self.descartadas = 0
+        self.rotaciones = 0
+
+    def _rotar(self, t):
+        self._anterior = self._actual
+        self._actual = {}
+        self._inicio_cubeta = t
+        self.rotaciones += 1
+
+    def es_repetida(self, uid, lector, t, ahora=None):
+        """`t` es la hora de la lectura en segundos (timestamp); `ahora`, el reloj monotónico."""
+        clave = (uid, lector)
+        ahora = time.monotonic() if ahora is None else ahora
+        with self._lock:
+            self.recibidas += 1
+            if self._inicio_cubeta is None:
+                self._inicio_cubeta = ahora
+            elif ahora - self._inicio_cubeta >= self.ventana or len(self._actual) >= self.capacidad:
+                self._rotar(ahora)
+
+            ultima = self._actual.get(clave)
+            if ultima is None:
+                ultima = self._anterior.get(clave)
+            self._actual[clave] = t if ultima is None else max(t, ultima)
+
+            if ultima is not None and abs(t - ultima) < self.ventana:
+                self.descartadas += 1
+                return True
+            return False
+
+    def olvidar(self, uid, lector):
+        """Quita una lectura aceptada que al final no se guardó, para que el reintento pase."""
+        clave = (uid, lector)
+        with self._lock:
+            self._actual.pop(clave, None)
+            self._anterior.pop(clave, None)
+
+    def metricas(self):
+        return {
+            "recibidas": self.recibidas,
+            "descartadas": self.descartadas,
+            # Fracción de escrituras que se ahorró la base
+            "ahorro": round(self.descartadas / self.recibidas, 4) if self.recibidas else 0.0,
+            "entradas": len(self._actual) + len(self._anterior),
+            "rotaciones": self.rotaciones,
+        }
+
+
+filtro_repetidas = FiltroRepetidas()
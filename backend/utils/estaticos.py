@@ -0,0 +1,138 @@
+import gzip
+import hashlib
+import mimetypes
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+
+from utils.cache import coincide_etag
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin el paquete solo se sirve gzip
+    brotli = None
+
+COMPRIMIBLES = {".html", ".css", ".js", ".json", ".svg", ".txt"}
+TAMANO_MINIMO = 256  # bytes; abajo de esto comprimir no ahorra nada
+INMUTABLE = "public, max-age=31536000, immutable"
+
+# Referencias a /static dentro del HTML que reciben ?v=<hash>
+_REFERENCIA = re.compile(r'((?:src|href)=")/static/([^"?#]+)(")')
+
+Archivo = namedtuple("Archivo", "tipo version variantes")  # variantes: codificación -> bytes
+
+
+def _tipo(ruta):
+    tipo = mimetypes.guess_type(ruta.name)[0] or "application/octet-stream"
+    if tipo.startswith("text/") or tipo in ("application/javascript", "application/json", "image/svg+xml"):
+        tipo += "; charset=utf-8"
+    return tipo
+
+
+def _variantes(ruta, datos):
+    variantes = {"identity": datos}
+    if ruta.suffix in COMPRIMIBLES and len(datos) >= TAMANO_MINIMO:
+        variantes["gzip"] = gzip.compress(datos, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variantes["br"] = brotli.compress(datos, quality=11)
+    return variantes
+
+
+def _codificaciones_aceptadas(encabezado):
+    aceptadas = set()
+    for parte in encabezado.split(","):
+        nombre, _, parametros = parte.partition(";")
+        q = parametros.strip().removeprefix("q=")
+        try:
+            if q and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        aceptadas.add(nombre.strip().lower())
+    return aceptadas
+
+
+class EstaticosComprimidos(StaticFiles):
+    """StaticFiles con variantes comprimidas, ETag y URLs versionadas.
+
+    Al arrancar lee el frontend completo (son pocos archivos), calcula el hash
+    de cada uno y guarda en memoria la versión gzip (y brotli si el paquete
+    está instalado). En el HTML, cada referencia a /static/... se reescribe
+    con ?v=<hash>; esas URLs cambian cuando cambia el archivo, así que se
+    sirven como inmutables. El HTML y las URLs sin versión se revalidan
+    siempre con el ETag. Lo que no se cargó al arrancar lo sirve StaticFiles.
+    """
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self.raiz = Path(directory)
+        self.archivos = {}
+        self.cargar()
+
+    def cargar(self):
+        archivos = {}
+        htmls = []
+        for ruta in sorted(self.raiz.rglob("*")):
+            if not ruta.is_file():
+                continue
+            relativa = ruta.relative_to(self.raiz).as_posix()
+            if ruta.suffix == ".html":
+                htmls.append((relativa, ruta))
+                continue
+            datos = ruta.read_bytes()
+            archivos[relativa] = Archivo(_tipo(ruta), hashlib.sha256(datos).hexdigest()[:12], _variantes(ruta, datos))
+
+        # El HTML se procesa al final porque necesita los hashes de lo que referencia
+        def versionar(m):
+            archivo = archivos.get(m.group(2))
+            if archivo is None:
+                return m.group(0)
+            return f"{m.group(1)}/static/{m.group(2)}?v={archivo.version}{m.group(3)}"
+
+        for relativa, ruta in htmls:
+            datos = _REFERENCIA.sub(versionar, ruta.read_text(encoding="utf-8")).encode("utf-8")
+            archivos[relativa] = Archivo(_tipo(ruta), hashlib.sha256(datos).hexdigest()[:12], _variantes(ruta, datos))
+
+        self.archivos = archivos
+        return len(archivos)
+
+    async def get_response(self, path, scope):
+        archivo = self.archivos.get(path)
+        if archivo is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        headers = Headers(scope=scope)
+        aceptadas = _codificaciones_aceptadas(headers.get("accept-encoding", ""))
+        codificacion = next((c for c in ("br", "gzip") if c in archivo.variantes and c in aceptadas), "identity")
+
+        etag = f'"{archivo.version}-{codificacion}"'
+        versionada = f"v={archivo.version}" in scope.get("query_string", b"").decode("latin-1").split("&")
+        respuesta_headers = {
+            "ETag": etag,
+            "Cache-Control": INMUTABLE if versionada else "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if codificacion != "identity":
+            respuesta_headers["Content-Encoding"] = codificacion
+
+        if coincide_etag(Request(scope), etag):
+            return Response(status_code=304, headers=respuesta_headers)
+
+        cuerpo = archivo.variantes[codificacion]
+        if scope["method"] == "HEAD":
+            respuesta_headers["Content-Length"] = str(len(cuerpo))
+            return Response(status_code=200, media_type=archivo.tipo, headers=respuesta_headers)
+        return Response(cuerpo, media_type=archivo.tipo, headers=respuesta_headers)
+
+    def metricas(self):
+        return {
+            "archivos": len(self.archivos),
+            "bytes": sum(len(a.variantes["identity"]) for a in self.archivos.values()),
+            "bytes_gzip": sum(len(a.variantes.get("gzip", a.variantes["identity"])) for a in self.archivos.values()),
+            "brotli": brotli is not None,
+        }
@@ -0,0 +1,200 @@
+import csv
+import io
+import re
+import zipfile
+from datetime import date, datetime, time
+from xml.sax.saxutils import escape
+
+from database import async_engine
+
+FILAS_POR_HOJA = 1048575  # Límite de Excel menos el encabezado
+TAMANO_BLOQUE = 1000
+
+_NO_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
+    return str(valor)
+
+
+class EscritorCSV:
+    """CSV por bloques: cada llamada regresa solo los bytes de ese bloque."""
+
+    def __init__(self, encabezados):
+        self.encabezados = encabezados
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer)
+
+    def _vaciar(self):
+        datos = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return datos.encode("utf-8")
+
+    def inicio(self):
+        # BOM para que Excel abra los acentos bien
+        self._buffer.write("\ufeff")
+        self._csv.writerow(self.encabezados)
+        return self._vaciar()
+
+    def filas(self, filas):
+        self._csv.writerows([_texto(v) for v in fila] for fila in filas)
+        return self._vaciar()
+
+    def fin(self):
+        return b""
+
+
+class _Salida:
+    """Destino sin seek para zipfile; se vacía después de cada bloque."""
+
+    def __init__(self):
+        self._partes = []
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self):
+        pass
+
+    def tomar(self):
+        datos = b"".join(self._partes)
+        self._partes = []
+        return datos
+
+
+class EscritorXLSX:
+    """XLSX mínimo escrito en streaming con zipfile, sin openpyxl.
+
+    Las hojas se escriben con cadenas en línea (sin sharedStrings, que
+    obligaría a guardar todos los textos hasta el final) y el zip se manda
+    sin seek usando descriptores de datos. Cuando una hoja llega al límite
+    de filas de Excel se abre otra; el libro y los tipos de contenido se
+    escriben al final, cuando ya se sabe cuántas hojas hubo.
+    """
+
+    def __init__(self, encabezados):
+        self.encabezados = encabezados
+        self._salida = _Salida()
+        self._zip = zipfile.ZipFile(self._salida, "w", zipfile.ZIP_DEFLATED)
+        self._hoja = None
+        self._hojas = 0
+        self._fila = 0
+
+    def _renglon(self, valores):
+        self._fila += 1
+        celdas = []
+        for valor in valores:
+            if isinstance(valor, bool) or valor is None:
+                valor = _texto(valor)
+            if isinstance(valor, (int, float)):
+                celdas.append(f"<c><v>{valor}</v></c>")
+            else:
+                texto = escape(_NO_XML.sub("", _texto(valor)))
+                celdas.append(f'<c t="inlineStr"><is><t>{texto}</t></is></c>')
+        return f'<row r="{self._fila}">{"".join(celdas)}</row>'
+
+    def _abrir_hoja(self):
+        self._hojas += 1
+        self._fila = 0
+        self._hoja = self._zip.open(f"xl/worksheets/sheet{self._hojas}.xml", "w", force_zip64=True)
+        self._hoja.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            + self._renglon(self.encabezados).encode("utf-8")
+        )
+
+    def _cerrar_hoja(self):
+        self._hoja.write(b"</sheetData></worksheet>")
+        self._hoja.close()
+        self._hoja = None
+
+    def inicio(self):
+        self._abrir_hoja()
+        return self._salida.tomar()
+
+    def filas(self, filas):
+        partes = []
+        for fila in filas:
+            if self._fila > FILAS_POR_HOJA:
+                self._hoja.write("".join(partes).encode("utf-8"))
+                partes = []
+                self._cerrar_hoja()
+                self._abrir_hoja()
+            partes.append(self._renglon(fila))
+        self._hoja.write("".join(partes).encode("utf-8"))
+        return self._salida.tomar()
+
+    def fin(self):
+        self._cerrar_hoja()
+        hojas = range(1, self._hojas + 1)
+        self._zip.writestr(
+            "[Content_Types].xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            + "".join(
+                f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                for i in hojas
+            )
+            + "</Types>",
+        )
+        self._zip.writestr(
+            "_rels/.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" '
+            'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+            'Target="xl/workbook.xml"/></Relationships>',
+        )
+        self._zip.writestr(
+            "xl/workbook.xml",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><sheets>'
+            + "".join(f'<sheet name="Asistencia{"" if i == 1 else f" {i}"}" sheetId="{i}" r:id="rId{i}"/>' for i in hojas)
+            + "</sheets></workbook>",
+        )
+        self._zip.writestr(
+            "xl/_rels/workbook.xml.rels",
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            + "".join(
+                f'<Relationship Id="rId{i}" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                f'Target="worksheets/sheet{i}.xml"/>'
+                for i in hojas
+            )
+            + "</Relationships>",
+        )
+        self._zip.close()
+        return self._salida.tomar()
+
+
+FORMATOS = {
+    "csv": (EscritorCSV, "text/csv; charset=utf-8"),
+    "xlsx": (EscritorXLSX, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+async def exportar_en_bloques(query, formato, tamano_bloque=TAMANO_BLOQUE):
+    """Genera el archivo por partes leyendo la consulta con un cursor del servidor."""
+    clase, _ = FORMATOS[formato]
+    escritor = clase(list(query.selected_columns.keys()))
+    yield escritor.inicio()
+    async with async_engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=tamano_bloque))
+        async for bloque in result.partitions():
+            datos = escritor.filas(bloque)
+            if datos:
+                yield datos
+    yield escritor.fin()
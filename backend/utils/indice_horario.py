@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import engine
+from models.horario import horario
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_RECARGA = float(os.getenv("HORARIO_INTERVALO_RECARGA", "300"))  # segundos
+ANTICIPACION = int(os.getenv("HORARIO_ANTICIPACION_MIN", "15"))  # Minutos antes del inicio que ya cuentan
+TOLERANCIA_RETARDO = int(os.getenv("HORARIO_TOLERANCIA_MIN", "10"))  # Minutos después del inicio sin retardo
+
+Sesion = namedtuple("Sesion", "id claveM numGrupo hora_inicio hora_fin")
+
+
+def _segundos(hora):
+    return hora.hour * 3600 + hora.minute * 60 + hora.second
+
+
+class IndiceHorario:
+    """Índice de intervalos por (aula, día) para saber a qué clase pertenece una lectura.
+
+    Para cada (aula, día) guarda los inicios de sesión ordenados (ya con la
+    anticipación restada) y resuelve cada lectura con una búsqueda binaria.
+    El horario es pequeño, así que cada recarga lo reconstruye completo y
+    reemplaza el índice de una sola vez.
+    """
+
+    def __init__(self, intervalo=INTERVALO_RECARGA, anticipacion=ANTICIPACION, tolerancia=TOLERANCIA_RETARDO):
+        self.intervalo = intervalo
+        self.anticipacion = anticipacion * 60
+        self.tolerancia = tolerancia * 60
+        self._indice = {}
+        self._detener = threading.Event()
+        self._hilo = None
+        self.sesiones = 0
+        self.ultima_recarga = None
+
+    def cargar(self):
+        query = select(
+            horario.c.id, horario.c.claveM, horario.c.numGrupo, horario.c.aula,
+            horario.c.dia, horario.c.hora_inicio, horario.c.hora_fin,
+        )
+        por_aula = {}
+        with engine.connect() as conn:
+            for fila in conn.execute(query):
+                sesion = Sesion(fila.id, fila.claveM, fila.numGrupo, fila.hora_inicio, fila.hora_fin)
+                por_aula.setdefault((fila.aula, fila.dia), []).append(sesion)
+
+        indice = {}
+        for clave, sesiones in por_aula.items():
+            sesiones.sort(key=lambda s: s.hora_inicio)
+            inicios = [max(_segundos(s.hora_inicio) - self.anticipacion, 0) for s in sesiones]
+            fines = [_segundos(s.hora_fin) for s in sesiones]
+            indice[clave] = (inicios, fines, sesiones)
+
+        self._indice = indice
+        self.sesiones = sum(len(v[2]) for v in indice.values())
+        self.ultima_recarga = datetime.now()
+        return self.sesiones
+
+    def buscar(self, aula, momento):
+        """Sesión que se imparte en `aula` en `momento`, o None. O(log n)."""
+        entrada = self._indice.get((aula, momento.weekday()))
+        if entrada is None:
+            return None
+        inicios, fines, sesiones = entrada
+        t = _segundos(momento)
+        # La última sesión cuyo inicio (con anticipación) ya pasó; si la ventana
+        # de anticipación se traslapa con la clase anterior, gana la que empieza
+        i = bisect_right(inicios, t) - 1
+        if i >= 0 and t < fines[i]:
+            return sesiones[i]
+        return None
+
+    def estado(self, hora_sesion, momento):
+        """'retardo' si la lectura llegó después de la tolerancia, si no 'presente'."""
+        if _segundos(momento) > _segundos(hora_sesion) + self.tolerancia:
+            return "retardo"
+        return "presente"
+
+    def metricas(self):
+        return {
+            "sesiones": self.sesiones,
+            "aulas_dia": len(self._indice),
+            "ultima_recarga": self.ultima_recarga.isoformat() if self.ultima_recarga else None,
+        }
+
+    def iniciar(self):
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="indice-horario", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join()
+        self._hilo = None
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.cargar()
+            except SQLAlchemyError:
+                logger.exception("No se pudo recargar el índice de horario")
+
+
+indice_horario = IndiceHorario()
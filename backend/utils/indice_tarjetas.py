@@ -0,0 +1,138 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import engine
+from models.tarjeta import tarjeta
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_RECARGA = float(os.getenv("RFID_INTERVALO_INDICE", "30"))  # segundos
+# Cada recarga vuelve a leer este margen antes del marcador: `actualizado` sale del reloj de
+# cada proceso y una fila puede confirmarse tarde con una hora menor que la ya vista
+SOLAPE_RECARGA = float(os.getenv("RFID_SOLAPE_INDICE", "120"))  # segundos
+
+
+class IndiceTarjetas:
+    """Índice en memoria UID de tarjeta -> matrícula.
+
+    Se carga completo al arrancar y después solo trae las filas de TARJETA
+    cuyo `actualizado` es posterior al último visto menos un margen de solape.
+
+    El mapa tiene dos escritores: el hilo de recarga y PUT /rfid/tarjetas,
+    que aplica su cambio al momento. Cada `dict` get/set/pop es atómico, así
+    que ni las consultas ni `aplicar` toman lock; el marcador solo lo toca la
+    recarga, bajo `_lock`. Si una recarga leyó la fila antes del PUT y la
+    aplica después, el valor viejo dura hasta la siguiente: el PUT deja
+    `actualizado` dentro de la ventana de solape y se vuelve a leer.
+    """
+
+    def __init__(self, intervalo=INTERVALO_RECARGA, solape=SOLAPE_RECARGA):
+        self.intervalo = intervalo
+        self.solape = timedelta(seconds=solape)
+        self._mapa = {}
+        self._marcador = None  # Mayor `actualizado` leído hasta ahora
+        self._lock = threading.Lock()  # Serializa las recargas
+        self._detener = threading.Event()
+        self._hilo = None
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.recargas = 0
+        self.cambios_aplicados = 0
+        self.ultima_recarga = None
+
+    def resolver(self, uid):
+        """Regresa la matrícula de la tarjeta o None si no está registrada."""
+        matricula = self._mapa.get(uid)
+        if matricula is None:
+            self.fallos += 1
+        else:
+            self.aciertos += 1
+        return matricula
+
+    def cargar(self):
+        """Carga completa del índice; se usa al arrancar."""
+        query = select(tarjeta.c.uid, tarjeta.c.matricula, tarjeta.c.actualizado).where(tarjeta.c.activa)
+        with self._lock:
+            mapa = {}
+            marcador = None
+            with engine.connect() as conn:
+                for fila in conn.execute(query):
+                    mapa[fila.uid] = fila.matricula
+                    if marcador is None or fila.actualizado > marcador:
+                        marcador = fila.actualizado
+            self._mapa = mapa
+            self._marcador = marcador
+            self.recargas += 1
+            self.ultima_recarga = datetime.now()
+        return len(mapa)
+
+    def refrescar(self):
+        """Aplica solo los cambios desde el último marcador."""
+        if self._marcador is None:
+            return self.cargar()
+
+        # Se relee la ventana de solape antes del marcador; las filas ya vistas no cuentan como cambio
+        query = (
+            select(tarjeta.c.uid, tarjeta.c.matricula, tarjeta.c.activa, tarjeta.c.actualizado)
+            .where(tarjeta.c.actualizado >= self._marcador - self.solape)
+        )
+        with self._lock:
+            cambios = 0
+            with engine.connect() as conn:
+                for fila in conn.execute(query):
+                    cambios += self.aplicar(fila.uid, fila.matricula, fila.activa)
+                    if fila.actualizado > self._marcador:
+                        self._marcador = fila.actualizado
+            self.recargas += 1
+            self.cambios_aplicados += cambios
+            self.ultima_recarga = datetime.now()
+        return cambios
+
+    def aplicar(self, uid, matricula, activa=True):
+        """Actualiza una entrada sin esperar a la siguiente recarga. Regresa True si cambió."""
+        if activa:
+            if self._mapa.get(uid) == matricula:
+                return False
+            self._mapa[uid] = matricula
+            return True
+        return self._mapa.pop(uid, None) is not None
+
+    def metricas(self):
+        return {
+            "tamano": len(self._mapa),
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "recargas": self.recargas,
+            "cambios_aplicados": self.cambios_aplicados,
+            "ultima_recarga": self.ultima_recarga.isoformat() if self.ultima_recarga else None,
+        }
+
+    def iniciar(self):
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="indice-tarjetas", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join()
+        self._hilo = None
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.refrescar()
+            except SQLAlchemyError:
+                logger.exception("No se pudo refrescar el índice de tarjetas")
+
+
+indice_tarjetas = IndiceTarjetas()
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+NIVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Loggers de uvicorn que también se mandan a la cola en vez de escribir directo
+LOGGERS_UVICORN = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+_cola = queue.SimpleQueue()
+_listener = None
+_originales = {}  # nombre -> (handlers, propagate) de antes de configurar, para restaurarlos
+
+
+class FormatoJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos pasados en `extra`."""
+
+    CAMPOS_BASE = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+    def format(self, record):
+        datos = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": record.getMessage(),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in self.CAMPOS_BASE:
+                datos[clave] = valor
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+def configurar_logging():
+    """Los handlers solo encolan; un hilo de fondo escribe a stderr.
+
+    Así un endpoint nunca se bloquea escribiendo a la terminal, y los
+    mensajes debajo de LOG_LEVEL se descartan antes de formatearse.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    salida = logging.StreamHandler(sys.stderr)
+    salida.setFormatter(FormatoJSON())
+    encolar = QueueHandler(_cola)
+
+    raiz = logging.getLogger()
+    raiz.setLevel(NIVEL)
+    _originales[None] = (raiz.handlers, raiz.propagate)
+    raiz.handlers = [encolar]
+    for nombre in LOGGERS_UVICORN:
+        logger = logging.getLogger(nombre)
+        _originales[nombre] = (logger.handlers, logger.propagate)
+        logger.handlers = [encolar]
+        logger.propagate = False
+
+    _listener = QueueListener(_cola, salida)
+    _listener.start()
+
+
+def detener_logging():
+    global _listener
+    if _listener is None:
+        return
+    # Primero se quitan los QueueHandler: lo que se registre después ya no cae en una cola sin lector
+    for nombre, (handlers, propagate) in _originales.items():
+        logger = logging.getLogger(nombre)
+        logger.handlers = handlers
+        logger.propagate = propagate
+    _originales.clear()
+    # Escribe lo que quede en la cola antes de salir
+    _listener.stop()
+    _listener = None
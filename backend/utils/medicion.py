@@ -0,0 +1,88 @@
+import time
+from contextvars import ContextVar
+
+from database import observadores_consultas
+from utils.metricas import FamiliaHistogramas
+
+# Cubetas en segundos, de 1 ms a 10 s
+LIMITES = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+latencia_http = FamiliaHistogramas(
+    "http_duracion_segundos", "Duración de las peticiones HTTP", ("ruta", "metodo", "estado"), LIMITES
+)
+tiempo_db_http = FamiliaHistogramas(
+    "http_db_segundos", "Tiempo en la base por petición HTTP", ("ruta", "metodo"), LIMITES
+)
+
+# Acumulador de tiempo en la base de la petición actual. Es una lista para que
+# los hilos del threadpool y los greenlets del motor async sumen sobre el mismo
+# objeto aunque trabajen con una copia del contexto.
+_tiempo_db = ContextVar("tiempo_db", default=None)
+
+
+def _sumar_tiempo_db(duracion):
+    acumulado = _tiempo_db.get()
+    if acumulado is not None:
+        acumulado[0] += duracion
+
+
+def medir_consultas():
+    """Suma el tiempo de cada consulta a la petición que la hizo.
+
+    Usa la duración que ya mide database.py para las huellas de consultas,
+    en los dos motores; así cada consulta se cronometra una sola vez.
+    """
+    if _sumar_tiempo_db not in observadores_consultas:
+        observadores_consultas.append(_sumar_tiempo_db)
+
+
+class MedicionPeticiones:
+    """Middleware ASGI puro: latencia por ruta y estado, peticiones en curso y tiempo en la base.
+
+    La ruta es la plantilla (`/asistencias/alumno/{matricula}`), no la URL,
+    para que la cantidad de series quede fija. Los contadores solo se tocan
+    desde el event loop, así que no llevan lock.
+    """
+
+    # En la clase, como en pool_instrumentado: Starlette crea la instancia por su cuenta
+    en_curso = 0
+    total = 0
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = 500
+        acumulado = [0.0]
+        token = _tiempo_db.set(acumulado)
+
+        async def send_con_estado(mensaje):
+            nonlocal estado
+            if mensaje["type"] == "http.response.start":
+                estado = mensaje["status"]
+            await send(mensaje)
+
+        MedicionPeticiones.en_curso += 1
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_con_estado)
+        finally:
+            duracion = time.perf_counter() - inicio
+            MedicionPeticiones.en_curso -= 1
+            MedicionPeticiones.total += 1
+            _tiempo_db.reset(token)
+
+            ruta = scope.get("route")
+            # Lo que no pasó por un router (archivos estáticos, 404) se agrupa por montaje
+            etiqueta = ruta.path if ruta is not None else (scope.get("root_path") or "sin_ruta")
+            metodo = scope["method"]
+            latencia_http.serie(etiqueta, metodo, estado).observar(duracion)
+            tiempo_db_http.serie(etiqueta, metodo).observar(acumulado[0])
+
+    @classmethod
+    def metricas(cls):
+        return {"en_curso": cls.en_curso, "total": cls.total}
@@ -0,0 +1,102 @@
+# Registro de colectores de métricas que lee el endpoint /metrics.
+# Cada colector es una función sin argumentos que regresa un dict de valores.
+from bisect import bisect_left
+
+PREFIJO = "asistencia"
+
+_colectores = {}
+_familias = {}
+
+
+def registrar_colector(nombre, funcion):
+    _colectores[nombre] = funcion
+
+
+def recolectar():
+    return {nombre: funcion() for nombre, funcion in _colectores.items()}
+
+
+class Histograma:
+    """Histograma con cubetas fijas, creado una vez por combinación de etiquetas.
+
+    Observar es una búsqueda binaria y dos sumas sobre listas ya reservadas.
+    Solo se llama desde el event loop, así que no necesita lock.
+    """
+
+    __slots__ = ("limites", "cuentas", "suma", "total")
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)  # La última es +Inf
+        self.suma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.cuentas[bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+
+class FamiliaHistogramas:
+    """Histogramas con el mismo nombre y cubetas, uno por juego de etiquetas."""
+
+    def __init__(self, nombre, ayuda, etiquetas, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = tuple(limites)
+        self.series = {}
+        _familias[nombre] = self
+
+    def serie(self, *valores):
+        histograma = self.series.get(valores)
+        if histograma is None:
+            histograma = self.series[valores] = Histograma(self.limites)
+        return histograma
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor):
+    if isinstance(valor, bool):
+        return 1 if valor else 0
+    if isinstance(valor, (int, float)):
+        return valor
+    return None
+
+
+def renderizar_texto():
+    """Todas las métricas en el formato de texto de Prometheus."""
+    lineas = []
+    for familia in _familias.values():
+        nombre = f"{PREFIJO}_{familia.nombre}"
+        lineas.append(f"# HELP {nombre} {familia.ayuda}")
+        lineas.append(f"# TYPE {nombre} histogram")
+        for valores, h in list(familia.series.items()):
+            acumulado = 0
+            for limite, cuenta in zip((*familia.limites, "+Inf"), h.cuentas):
+                acumulado += cuenta
+                le = f'le="{limite}"'
+                lineas.append(f"{nombre}_bucket{_etiquetas(familia.etiquetas, valores, le)} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas(familia.etiquetas, valores)} {h.suma}")
+            lineas.append(f"{nombre}_count{_etiquetas(familia.etiquetas, valores)} {h.total}")
+
+    # Los colectores regresan dicts planos; cada valor numérico sale como una métrica sin tipo
+    for colector, valores in recolectar().items():
+        for clave, valor in valores.items():
+            numero = _numero(valor)
+            if numero is None:
+                continue
+            nombre = f"{PREFIJO}_{colector}_{clave}"
+            lineas.append(f"# TYPE {nombre} untyped")
+            lineas.append(f"{nombre} {numero}")
+    return "\n".join(lineas) + "\n"
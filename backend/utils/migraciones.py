@@ -0,0 +1,19 @@
+import os
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+
+from database import engine
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# Con varios workers conviene apagarlo y correr `alembic upgrade head` antes de arrancar
+MIGRAR_AL_INICIAR = os.getenv("DB_MIGRAR", "1") == "1"
+
+
+def aplicar_migraciones():
+    """Lleva la base a la última revisión; si ya está al día no hace nada."""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    with engine.begin() as conn:
+        config.attributes["connection"] = conn
+        command.upgrade(config, "head")
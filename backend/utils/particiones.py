@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+from datetime import date, datetime
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import engine
+from models.asistencia import asistencia
+
+logger = logging.getLogger(__name__)
+
+INTERVALO = float(os.getenv("PARTICIONES_INTERVALO", str(12 * 3600)))  # segundos
+MESES_ADELANTE = int(os.getenv("PARTICIONES_MESES_ADELANTE", "3"))  # Particiones vacías listas por delante
+# Meses completos que se quedan en ASISTENCIA; lo anterior se mueve a tablas de archivo. 0 = nunca
+MESES_ARCHIVO = int(os.getenv("PARTICIONES_MESES_ARCHIVO", "0"))
+
+FUTURO = "p_futuro"  # Partición MAXVALUE que recibe lo que no tenga mes propio
+
+
+def sumar_meses(mes, n):
+    indice = mes.year * 12 + mes.month - 1 + n
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def nombre_particion(mes):
+    return f"p{mes:%Y%m}"
+
+
+def definicion_particion(mes):
+    # Cada partición guarda un mes: todo lo anterior al primer día del siguiente
+    return f"PARTITION {nombre_particion(mes)} VALUES LESS THAN ('{sumar_meses(mes, 1).isoformat()}')"
+
+
+class MantenimientoParticiones:
+    """Particiones mensuales de ASISTENCIA en MySQL (RANGE COLUMNS por fecha).
+
+    Mantiene `meses_adelante` meses creados antes de que lleguen, partiendo
+    `p_futuro` (vacía, así que es inmediato). Con `meses_archivo` mayor que
+    cero cambia cada mes viejo por una tabla `ASISTENCIA_pAAAAMM` con
+    EXCHANGE PARTITION, que solo mueve metadatos, y borra la partición.
+    RESUMEN_ASISTENCIA no cambia: sus contadores incluyen lo archivado.
+    En SQLite no hace nada.
+    """
+
+    def __init__(self, intervalo=INTERVALO, meses_adelante=MESES_ADELANTE, meses_archivo=MESES_ARCHIVO):
+        self.intervalo = intervalo
+        self.meses_adelante = meses_adelante
+        self.meses_archivo = meses_archivo
+        self._detener = threading.Event()
+        self._hilo = None
+
+        self.particiones = 0
+        self.creadas = 0
+        self.archivadas = 0
+        self.ultima_revision = None
+
+    def _meses(self, conn):
+        """Meses con partición propia, en orden."""
+        filas = conn.execute(
+            text(
+                "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla AND PARTITION_NAME IS NOT NULL"
+            ),
+            {"tabla": asistencia.name},
+        ).scalars()
+        return sorted(date(int(n[1:5]), int(n[5:7]), 1) for n in filas if n != FUTURO)
+
+    def _crear_futuras(self, conn, meses, hoy):
+        objetivo = sumar_meses(date(hoy.year, hoy.month, 1), self.meses_adelante)
+        mes = sumar_meses(meses[-1], 1)
+        nuevos = []
+        while mes <= objetivo:
+            nuevos.append(mes)
+            mes = sumar_meses(mes, 1)
+        if not nuevos:
+            return []
+        definiciones = ", ".join(definicion_particion(m) for m in nuevos)
+        conn.execute(text(
+            f"ALTER TABLE `{asistencia.name}` REORGANIZE PARTITION {FUTURO} INTO "
+            f"({definiciones}, PARTITION {FUTURO} VALUES LESS THAN (MAXVALUE))"
+        ))
+        return nuevos
+
+    def _archivar(self, conn, meses, hoy):
+        if self.meses_archivo <= 0:
+            return []
+        limite = sumar_meses(date(hoy.year, hoy.month, 1), -self.meses_archivo)
+        viejos = [m for m in meses if m < limite]
+        archivadas = []
+        for mes in viejos:
+            if self._archivar_mes(conn, nombre_particion(mes)):
+                archivadas.append(mes)
+        return archivadas
+
+    def _archivar_mes(self, conn, nombre):
+        """CREATE, REMOVE PARTITIONING, EXCHANGE y DROP, saltando lo que ya hizo una corrida anterior.
+
+        Cada ALTER se confirma solo, así que una falla a medias deja el mes en
+        cualquier punto; antes de cada paso se revisa el estado real.
+        """
+        archivo = f"{asistencia.name}_{nombre}"
+        existe = conn.execute(
+            text(
+                "SELECT COUNT(*) FROM information_schema.TABLES "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla"
+            ),
+            {"tabla": archivo},
+        ).scalar()
+        if not existe:
+            conn.execute(text(f"CREATE TABLE `{archivo}` LIKE `{asistencia.name}`"))
+        # Solo la tabla recién copiada con LIKE trae las particiones
+        particionada = conn.execute(
+            text(
+                "SELECT COUNT(*) FROM information_schema.PARTITIONS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla AND PARTITION_NAME IS NOT NULL"
+            ),
+            {"tabla": archivo},
+        ).scalar()
+        if particionada:
+            conn.execute(text(f"ALTER TABLE `{archivo}` REMOVE PARTITIONING"))
+
+        en_archivo = conn.execute(text(f"SELECT 1 FROM `{archivo}` LIMIT 1")).first() is not None
+        en_particion = conn.execute(
+            text(f"SELECT 1 FROM `{asistencia.name}` PARTITION ({nombre}) LIMIT 1")
+        ).first() is not None
+        if en_archivo and en_particion:
+            # Llegaron registros a un mes ya intercambiado: borrar la partición los perdería
+            logger.error("La partición y su archivo tienen registros; se deja sin archivar",
+                         extra={"particion": nombre, "tabla": archivo})
+            return False
+        if en_particion:
+            conn.execute(text(f"ALTER TABLE `{asistencia.name}` EXCHANGE PARTITION {nombre} WITH TABLE `{archivo}`"))
+        conn.execute(text(f"ALTER TABLE `{asistencia.name}` DROP PARTITION {nombre}"))
+        logger.info("Partición archivada", extra={"particion": nombre, "tabla": archivo})
+        return True
+
+    def revisar(self, hoy=None):
+        """Crea los meses que falten y archiva los viejos. Regresa qué cambió."""
+        if engine.dialect.name != "mysql":
+            return {"creadas": [], "archivadas": []}
+        hoy = hoy or date.today()
+        # Los ALTER de MySQL se confirman solos; no hace falta transacción
+        with engine.connect() as conn:
+            meses = self._meses(conn)
+            if not meses:
+                logger.warning("ASISTENCIA no está particionada; falta la migración 0003")
+                return {"creadas": [], "archivadas": []}
+            creadas = self._crear_futuras(conn, meses, hoy)
+            archivadas = self._archivar(conn, meses, hoy)
+            self.particiones = len(meses) + len(creadas) - len(archivadas) + 1  # + p_futuro
+        self.creadas += len(creadas)
+        self.archivadas += len(archivadas)
+        self.ultima_revision = datetime.now()
+        return {
+            "creadas": [nombre_particion(m) for m in creadas],
+            "archivadas": [nombre_particion(m) for m in archivadas],
+        }
+
+    def metricas(self):
+        return {
+            "particiones": self.particiones,
+            "creadas": self.creadas,
+            "archivadas": self.archivadas,
+            "ultima_revision": self.ultima_revision.isoformat() if self.ultima_revision else None,
+        }
+
+    def iniciar(self):
+        if self._hilo is not None or engine.dialect.name != "mysql":
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="particiones-asistencia", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join()
+        self._hilo = None
+
+    def _ciclo(self):
+        # Revisa al arrancar y luego cada `intervalo`. Si dos workers chocan, el ALTER
+        # del segundo falla, queda en el log y la siguiente vuelta ya no tiene nada que hacer
+        while True:
+            try:
+                self.revisar()
+            except SQLAlchemyError:
+                logger.exception("No se pudieron revisar las particiones de ASISTENCIA")
+            if self._detener.wait(self.intervalo):
+                return
+
+
+mantenimiento_particiones = MantenimientoParticiones()
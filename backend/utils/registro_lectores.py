@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select
+
+from database import engine
+from models.lector import lector
+from utils.upsert import sentencia_upsert
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_GUARDADO = float(os.getenv("LECTORES_INTERVALO_GUARDADO", "30"))  # segundos
+SILENCIO = float(os.getenv("LECTORES_SILENCIO", "120"))  # segundos sin señal para considerarlo caído
+
+
+def sentencia_lectores(dialecto):
+    """INSERT que actualiza el estado del lector si ya existe, sin retroceder en el tiempo.
+
+    Cada worker guarda lo que vio; uno con estado más viejo no debe mover
+    `ultima_senal` hacia atrás ni pisar la cola y el firmware más recientes.
+    """
+    mayor = func.max if dialecto == "sqlite" else func.greatest  # max() de SQLite con dos argumentos
+
+    def valores(nuevo):
+        mas_reciente = nuevo.ultima_senal >= lector.c.ultima_senal
+        return {
+            "firmware": case((mas_reciente, func.coalesce(nuevo.firmware, lector.c.firmware)), else_=lector.c.firmware),
+            "cola": case((mas_reciente, nuevo.cola), else_=lector.c.cola),
+            "ultima_senal": mayor(lector.c.ultima_senal, nuevo.ultima_senal),
+        }
+
+    return sentencia_upsert(dialecto, lector, ("id",), valores)
+
+
+class RegistroLectores:
+    """Estado de cada lector en memoria, guardado a LECTOR por lotes.
+
+    Cada señal (o lectura) solo actualiza el diccionario y marca el lector
+    como pendiente; un hilo de fondo escribe los pendientes cada
+    `intervalo` segundos en un solo executemany, sin importar cuántas
+    señales llegaron entre una escritura y otra.
+
+    Con varios workers cada uno ve solo sus señales: LECTOR es el estado
+    común. El hilo lo vuelve a leer tras cada escritura y las rutas de
+    consulta lo mezclan con lo local antes de responder.
+    """
+
+    def __init__(self, intervalo=INTERVALO_GUARDADO, silencio=SILENCIO):
+        self.intervalo = intervalo
+        self.silencio = silencio
+        self._lectores = {}  # id -> {"firmware", "cola", "ultima_senal"}
+        self._pendientes = set()
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo = None
+
+        self.senales = 0
+        self.guardados = 0
+        self.ultimo_guardado = None
+
+    def cargar(self):
+        """Estado guardado, para reconocer lectores caídos aunque el servidor se haya reiniciado."""
+        with engine.connect() as conn:
+            filas = conn.execute(select(lector)).all()
+        self.incorporar(filas)
+        return len(filas)
+
+    def incorporar(self, filas):
+        """Mezcla filas de LECTOR con el estado local; gana la señal más reciente."""
+        with self._lock:
+            for fila in filas:
+                estado = self._lectores.get(fila.id)
+                if estado is None or fila.ultima_senal > estado["ultima_senal"]:
+                    self._lectores[fila.id] = {
+                        "firmware": fila.firmware, "cola": fila.cola, "ultima_senal": fila.ultima_senal,
+                    }
+
+    def senal(self, id_lector, firmware=None, cola=None, momento=None):
+        momento = momento or datetime.now()
+        with self._lock:
+            self.senales += 1
+            estado = self._lectores.get(id_lector)
+            if estado is None:
+                estado = self._lectores[id_lector] = {"firmware": None, "cola": 0, "ultima_senal": momento}
+            estado["ultima_senal"] = max(estado["ultima_senal"], momento)
+            if firmware is not None:
+                estado["firmware"] = firmware
+            if cola is not None:
+                estado["cola"] = cola
+            self._pendientes.add(id_lector)
+
+    def persistir(self):
+        """Escribe los lectores con señales nuevas. Regresa cuántos guardó."""
+        with self._lock:
+            if not self._pendientes:
+                return 0
+            filas = [{"id": i, **self._lectores[i]} for i in self._pendientes]
+            self._pendientes = set()
+        try:
+            with engine.begin() as conn:
+                conn.execute(sentencia_lectores(conn.dialect.name), filas)
+        except Exception:
+            # Se vuelven a marcar para el siguiente intento
+            with self._lock:
+                self._pendientes.update(f["id"] for f in filas)
+            raise
+        self.guardados += len(filas)
+        self.ultimo_guardado = datetime.now()
+        return len(filas)
+
+    def estado(self, ahora=None):
+        """Todos los lectores con los segundos desde su última señal."""
+        ahora = ahora or datetime.now()
+        with self._lock:
+            lectores = [(i, dict(e)) for i, e in self._lectores.items()]
+        resultado = []
+        for id_lector, estado in lectores:
+            segundos = (ahora - estado["ultima_senal"]).total_seconds()
+            resultado.append({
+                "lector": id_lector,
+                **estado,
+                "segundos_sin_senal": round(segundos, 1),
+                "silencioso": segundos > self.silencio,
+            })
+        resultado.sort(key=lambda e: e["segundos_sin_senal"], reverse=True)
+        return resultado
+
+    def silenciosos(self, silencio=None, ahora=None):
+        ahora = ahora or datetime.now()
+        limite = ahora - timedelta(seconds=self.silencio if silencio is None else silencio)
+        with self._lock:
+            caidos = [(i, dict(e)) for i, e in self._lectores.items() if e["ultima_senal"] < limite]
+        caidos.sort(key=lambda e: e[1]["ultima_senal"])
+        return [
+            {"lector": i, **e, "segundos_sin_senal": round((ahora - e["ultima_senal"]).total_seconds(), 1)}
+            for i, e in caidos
+        ]
+
+    def metricas(self):
+        return {
+            "lectores": len(self._lectores),
+            "silenciosos": len(self.silenciosos()),
+            "senales": self.senales,
+            "guardados": self.guardados,
+            "pendientes": len(self._pendientes),
+            "ultimo_guardado": self.ultimo_guardado.isoformat() if self.ultimo_guardado else None,
+        }
+
+    def iniciar(self):
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="registro-lectores", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        if self._hilo is None:
+            return
+        self._detener.set()
+        self._hilo.join()
+        self._hilo = None
+        try:
+            self.persistir()
+        except Exception:
+            logger.exception("No se pudo guardar el estado de los lectores al apagar")
+
+    def _ciclo(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.persistir()
+                self.cargar()  # Lo que guardaron los otros workers
+            except Exception:
+                # Cualquier error (no solo de la base) queda en el log; el hilo sigue vivo
+                logger.exception("No se pudo guardar el estado de los lectores")
+
+
+registro_lectores = RegistroLectores()
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from sqlalchemy import case, delete, func, insert, literal, select
+
+from models.asistencia import asistencia
+from models.resumen_asistencia import resumen_asistencia
+from utils.upsert import sentencia_upsert
+
+CONTADORES = ("asistencias", "retardos", "total")
+
+
+def deltas_resumen(nuevos, anteriores=()):
+    """Cambios a RESUMEN_ASISTENCIA por (matrícula, claveM).
+
+    `nuevos` son filas de ASISTENCIA que se insertan y `anteriores` las que
+    se borran o reemplazan en la misma transacción.
+    """
+    ahora = datetime.now()
+    cambios = {}
+    for registros, signo in ((nuevos, 1), (anteriores, -1)):
+        for r in registros:
+            clave = (r["matricula"], r["claveM"])
+            fila = cambios.get(clave)
+            if fila is None:
+                fila = cambios[clave] = {
+                    "matricula": r["matricula"], "claveM": r["claveM"],
+                    "asistencias": 0, "retardos": 0, "total": 0, "actualizado": ahora,
+                }
+            fila["total"] += signo
+            if r["estado"] != "ausente":
+                fila["asistencias"] += signo
+            if r["estado"] == "retardo":
+                fila["retardos"] += signo
+    return [f for f in cambios.values() if any(f[c] for c in CONTADORES)]
+
+
+def sentencia_resumen(dialecto):
+    """INSERT que suma a los contadores si el renglón ya existe."""
+    return sentencia_upsert(
+        dialecto, resumen_asistencia, ("matricula", "claveM"),
+        lambda nuevo: {
+            "actualizado": nuevo.actualizado,
+            **{c: resumen_asistencia.c[c] + nuevo[c] for c in CONTADORES},
+        },
+    )
+
+
+def reconstruir_resumen(conn):
+    """Recalcula todo el resumen desde ASISTENCIA. Regresa cuántos renglones quedaron."""
+    conn.execute(delete(resumen_asistencia))
+    query = select(
+        asistencia.c.matricula,
+        asistencia.c.claveM,
+        func.sum(case((asistencia.c.estado != "ausente", 1), else_=0)),
+        func.sum(case((asistencia.c.estado == "retardo", 1), else_=0)),
+        func.count(),
+        literal(datetime.now(), resumen_asistencia.c.actualizado.type),
+    ).group_by(asistencia.c.matricula, asistencia.c.claveM)
+    conn.execute(
+        insert(resumen_asistencia).from_select(
+            ["matricula", "claveM", *CONTADORES, "actualizado"], query
+        )
+    )
+    return conn.execute(select(func.count()).select_from(resumen_asistencia)).scalar()
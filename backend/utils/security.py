@@ -0,0 +1,143 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Costo de scrypt: N = 2**PASSWORD_SCRYPT_LOG_N. Cada +1 duplica tiempo y memoria
+SCRYPT_LOG_N = int(os.getenv("PASSWORD_SCRYPT_LOG_N", "14"))
+SCRYPT_R = int(os.getenv("PASSWORD_SCRYPT_R", "8"))
+SCRYPT_P = int(os.getenv("PASSWORD_SCRYPT_P", "1"))
+
+# Rehash perezoso: al iniciar sesión se reemplazan contraseñas en texto plano o con costo viejo
+REHASH_AL_LOGIN = os.getenv("PASSWORD_REHASH", "0") == "1"
+
+TAMANO_CACHE = int(os.getenv("PASSWORD_CACHE", "4096"))
+HILOS_HASH = int(os.getenv("PASSWORD_HILOS", str(os.cpu_count() or 2)))
+
+PREFIJO = "scrypt"
+LONGITUD_SAL = 16
+LONGITUD_HASH = 32
+
+# hashlib.scrypt libera el GIL, así que un pool de hilos usa todos los núcleos
+_executor = ThreadPoolExecutor(max_workers=HILOS_HASH, thread_name_prefix="password")
+
+
+def _b64(datos):
+    return base64.b64encode(datos).decode().rstrip("=")
+
+
+def _desde_b64(texto):
+    return base64.b64decode(texto + "=" * (-len(texto) % 4))
+
+
+def _scrypt(password, sal, log_n, r, p):
+    n = 2 ** log_n
+    return hashlib.scrypt(
+        password.encode(), salt=sal, n=n, r=r, p=p,
+        maxmem=256 * n * r + 1024 * 1024,  # El default de OpenSSL (32 MB) no alcanza con N alto
+        dklen=LONGITUD_HASH,
+    )
+
+
+def hash_password(password, log_n=None, r=None, p=None):
+    """Regresa `scrypt$log_n$r$p$sal$hash`, que cabe en la columna password (100)."""
+    log_n = SCRYPT_LOG_N if log_n is None else log_n
+    r = SCRYPT_R if r is None else r
+    p = SCRYPT_P if p is None else p
+    sal = secrets.token_bytes(LONGITUD_SAL)
+    return f"{PREFIJO}${log_n}${r}${p}${_b64(sal)}${_b64(_scrypt(password, sal, log_n, r, p))}"
+
+
+def es_hash(guardado):
+    return guardado is not None and guardado.startswith(PREFIJO + "$")
+
+
+def verify_password(password, guardado):
+    if guardado is None:
+        return False
+    if not es_hash(guardado):
+        # Contraseñas que todavía están en texto plano en la base
+        return hmac.compare_digest(password.encode(), guardado.encode())
+
+    try:
+        _, log_n, r, p, sal, esperado = guardado.split("$")
+        calculado = _scrypt(password, _desde_b64(sal), int(log_n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(calculado, _desde_b64(esperado))
+
+
+def necesita_rehash(guardado):
+    if not es_hash(guardado):
+        return True
+    _, log_n, r, p, _, _ = guardado.split("$")
+    return (int(log_n), int(r), int(p)) != (SCRYPT_LOG_N, SCRYPT_R, SCRYPT_P)
+
+
+class CacheVerificaciones:
+    """LRU acotado de verificaciones exitosas recientes.
+
+    La clave es un HMAC de (usuario, hash guardado, contraseña) con un secreto
+    del proceso, así que nunca se guarda la contraseña y un cambio de
+    contraseña invalida la entrada por sí solo.
+    """
+
+    def __init__(self, capacidad=TAMANO_CACHE):
+        self.capacidad = capacidad
+        self._secreto = secrets.token_bytes(32)
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def clave(self, usuario, guardado, password):
+        mensaje = "\0".join((usuario, guardado, password)).encode()
+        return hmac.new(self._secreto, mensaje, hashlib.sha256).digest()
+
+    def contiene(self, clave):
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return True
+            self.fallos += 1
+            return False
+
+    def agregar(self, clave):
+        with self._lock:
+            self._entradas[clave] = True
+            self._entradas.move_to_end(clave)
+            if len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def metricas(self):
+        return {"tamano": len(self._entradas), "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+cache_verificaciones = CacheVerificaciones()
+
+
+async def verificar_password(usuario, password, guardado):
+    """Verifica sin bloquear el event loop; los aciertos del caché no pagan el KDF."""
+    if guardado is None:
+        return False
+
+    clave = cache_verificaciones.clave(usuario, guardado, password)
+    if cache_verificaciones.contiene(clave):
+        return True
+
+    loop = asyncio.get_running_loop()
+    valido = await loop.run_in_executor(_executor, verify_password, password, guardado)
+    if valido:
+        cache_verificaciones.agregar(clave)
+    return valido
+
+
+async def hash_password_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, hash_password, password)
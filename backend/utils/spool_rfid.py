@@ -0,0 +1,481 @@
+import fcntl
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime, time
+from pathlib import Path
+
+from sqlalchemy import delete, select, tuple_
+
+from database import engine
+from models.asistencia import asistencia
+from models.lectura_rfid import lectura_rfid
+from models.resumen_asistencia import resumen_asistencia
+from utils.cache import cache_respuestas
+from utils.cierre_sesiones import ORIGEN_CIERRE
+from utils.indice_horario import indice_horario
+from utils.resumen import deltas_resumen, sentencia_resumen
+
+logger = logging.getLogger(__name__)
+
+# Ajustables por variables de entorno
+# Cada proceso escribe en su propio subdirectorio de SPOOL_DIR, bloqueado con flock
+SPOOL_DIR = Path(os.getenv("RFID_SPOOL_DIR", Path(__file__).resolve().parent.parent / "spool"))
+TAMANO_LOTE = int(os.getenv("RFID_TAMANO_LOTE", "2000"))  # Lecturas por transacción al drenar
+INTERVALO_VACIADO = float(os.getenv("RFID_INTERVALO_VACIADO", "0.5"))  # segundos
+INTERVALO_FSYNC = float(os.getenv("RFID_INTERVALO_FSYNC", "0.05"))  # segundos
+TAMANO_SEGMENTO = int(float(os.getenv("RFID_SPOOL_SEGMENTO_MB", "16")) * 1024 * 1024)
+CAPACIDAD_MAXIMA = int(float(os.getenv("RFID_SPOOL_MAX_MB", "512")) * 1024 * 1024)
+ESPERA_MAXIMA = 30.0  # Tope del backoff cuando la base no responde
+
+# Orden de los campos de cada línea del spool
+CAMPOS = ("uid", "lector", "matricula", "claveM", "sesion", "momento", "recibido")
+
+
+def _a_linea(fila):
+    valores = [fila[c] for c in CAMPOS]
+    valores[4] = valores[4].isoformat() if valores[4] else None
+    valores[5] = valores[5].isoformat()
+    valores[6] = valores[6].isoformat()
+    return json.dumps(valores, separators=(",", ":")).encode() + b"\n"
+
+
+def _desde_linea(linea):
+    fila = dict(zip(CAMPOS, json.loads(linea)))
+    fila["sesion"] = time.fromisoformat(fila["sesion"]) if fila["sesion"] else None
+    fila["momento"] = datetime.fromisoformat(fila["momento"])
+    fila["recibido"] = datetime.fromisoformat(fila["recibido"])
+    return fila
+
+
+def _bloquear(directorio):
+    """Toma el candado exclusivo del directorio. Regresa el descriptor, o None si otro proceso lo tiene."""
+    try:
+        fd = os.open(directorio / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+    except FileNotFoundError:
+        return None  # Otro proceso lo acaba de drenar y borrar
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    if not (directorio / ".lock").exists():
+        # Se borró mientras esperábamos el candado
+        os.close(fd)
+        return None
+    return fd
+
+
+class SpoolLecturas:
+    """Bitácora local (write-ahead) de lecturas RFID.
+
+    El endpoint solo agrega líneas al segmento actual y responde; un hilo hace
+    fsync cada `intervalo_fsync` segundos para todas las escrituras juntas, y
+    otro drena el spool a la base en lotes grandes, guardando en un checkpoint
+    hasta dónde llegó. Si MySQL está lento o caído, las lecturas se acumulan
+    en disco y el drenado sigue con backoff sin que la ingesta lo note.
+
+    Con varios workers cada proceso usa su propio subdirectorio de `base`,
+    bloqueado con flock mientras vive. Un directorio sin candado es de un
+    proceso que murió: al arrancar se toma uno como propio y el hilo de
+    drenado vacía y borra los demás.
+    """
+
+    def __init__(self, base=SPOOL_DIR, tamano_lote=TAMANO_LOTE, intervalo=INTERVALO_VACIADO,
+                 intervalo_fsync=INTERVALO_FSYNC, tamano_segmento=TAMANO_SEGMENTO, capacidad=CAPACIDAD_MAXIMA):
+        self.base = Path(base)
+        self.directorio = None  # Subdirectorio propio; se elige al iniciar
+        self._fd_candado = None
+        self.tamano_lote = tamano_lote
+        self.intervalo = intervalo
+        self.intervalo_fsync = intervalo_fsync
+        self.tamano_segmento = tamano_segmento
+        self.capacidad = capacidad
+
+        self._lock = threading.Lock()  # Protege el segmento de escritura
+        self._fd = None
+        self._segmento = 0
+        self._tamano_actual = 0
+        self._sucio = False
+        self._bytes_pendientes = 0  # Escritos y todavía no drenados
+
+        self._checkpoint = (0, 0)  # (segmento, offset) hasta donde ya está en la base
+        self._hay_datos = threading.Event()
+        self._detener = threading.Event()
+        self._hilos = []
+
+        # Contadores para monitoreo
+        self.recibidas = 0
+        self.rechazadas = 0
+        self.insertadas = 0
+        self.asistencias = 0
+        self.lotes = 0
+        self.errores = 0
+        self.fsyncs = 0
+        self.descartadas_corruptas = 0
+        self.huerfanos_drenados = 0
+
+    # --- Escritura ---
+
+    def _ruta(self, segmento):
+        return self.directorio / f"lecturas-{segmento:08d}.log"
+
+    def _segmentos(self):
+        return sorted(int(p.stem.split("-")[1]) for p in self.directorio.glob("lecturas-*.log"))
+
+    def _abrir_segmento(self, segmento):
+        self._fd = os.open(self._ruta(segmento), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._segmento = segmento
+        self._tamano_actual = 0
+
+    def agregar(self, filas):
+        """Escribe las filas al spool. Regresa False si el spool está lleno."""
+        datos = b"".join(_a_linea(f) for f in filas)
+        with self._lock:
+            if self._bytes_pendientes + len(datos) > self.capacidad:
+                self.rechazadas += len(filas)
+                return False
+            if self._tamano_actual >= self.tamano_segmento:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._abrir_segmento(self._segmento + 1)
+            os.write(self._fd, datos)
+            self._tamano_actual += len(datos)
+            self._bytes_pendientes += len(datos)
+            self._sucio = True
+            self.recibidas += len(filas)
+        # Con un lote completo esperando se despierta al drenado sin esperar el intervalo
+        if self._bytes_pendientes >= self.tamano_lote * 120:
+            self._hay_datos.set()
+        return True
+
+    def _ciclo_fsync(self):
+        # Un fsync por intervalo para todas las escrituras acumuladas (group commit)
+        while not self._detener.wait(self.intervalo_fsync):
+            self._sincronizar()
+
+    def _sincronizar(self):
+        with self._lock:
+            if not self._sucio:
+                return
+            self._sucio = False
+            fd = os.dup(self._fd)  # El fsync se hace fuera del lock para no frenar a los endpoints
+        try:
+            os.fsync(fd)
+            self.fsyncs += 1
+        finally:
+            os.close(fd)
+
+    # --- Checkpoint ---
+
+    def _leer_checkpoint(self):
+        ruta = self.directorio / "checkpoint.json"
+        if ruta.exists():
+            datos = json.loads(ruta.read_text())
+            return datos["segmento"], datos["offset"]
+        segmentos = self._segmentos()
+        return (segmentos[0] if segmentos else 0), 0
+
+    def _guardar_checkpoint(self, segmento, offset):
+        ruta = self.directorio / "checkpoint.json"
+        temporal = ruta.with_suffix(".tmp")
+        with open(temporal, "w") as f:
+            json.dump({"segmento": segmento, "offset": offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)  # Reemplazo atómico
+        self._checkpoint = (segmento, offset)
+
+    # --- Drenado ---
+
+    def _leer_lote(self):
+        """Lee hasta `tamano_lote` líneas completas desde el checkpoint.
+
+        Regresa (filas, segmento, offset_final). Al terminar un segmento que ya
+        no se está escribiendo, avanza al siguiente y borra el anterior.
+        """
+        segmento, offset = self._checkpoint
+        while True:
+            # Se lee el segmento activo antes que el archivo: si ya no era el activo,
+            # el escritor no le va a agregar nada y es seguro borrarlo al terminarlo
+            activo = self._segmento
+            ruta = self._ruta(segmento)
+            if not ruta.exists():
+                if segmento >= activo:
+                    return [], segmento, offset
+                # Ya se había borrado (crash entre el borrado y el checkpoint)
+                segmento, offset = segmento + 1, 0
+                self._guardar_checkpoint(segmento, offset)
+                continue
+            with open(ruta, "rb") as f:
+                f.seek(offset)
+                datos = f.read(self.tamano_lote * 256)  # Cada línea ocupa ~120 bytes
+
+            fin = datos.rfind(b"\n") + 1  # Solo líneas completas
+            if fin == 0 and segmento == activo:
+                return [], segmento, offset
+            if fin == 0:
+                # Segmento viejo terminado (o con una última línea truncada por un crash)
+                if datos:
+                    self.descartadas_corruptas += 1
+                    logger.warning("Se descarta una línea incompleta al final de %s", ruta.name)
+                ruta.unlink()
+                with self._lock:
+                    self._bytes_pendientes -= len(datos)
+                segmento, offset = segmento + 1, 0
+                self._guardar_checkpoint(segmento, offset)
+                continue
+
+            filas = []
+            for linea in datos[:fin].splitlines()[:self.tamano_lote]:
+                try:
+                    filas.append(_desde_linea(linea))
+                except (ValueError, KeyError, TypeError):
+                    self.descartadas_corruptas += 1
+                    logger.warning("Línea corrupta en %s: %r", ruta.name, linea[:200])
+                offset += len(linea) + 1
+            return filas, segmento, offset
+
+    def drenar(self):
+        """Pasa un lote del spool a la base. Regresa cuántas lecturas guardó."""
+        filas, segmento, offset = self._leer_lote()
+        if offset == self._checkpoint[1] and segmento == self._checkpoint[0]:
+            return 0
+
+        if filas:
+            with engine.begin() as conn:
+                nuevas = guardar_lecturas(conn, filas)
+            if nuevas:
+                cache_respuestas.invalidar(asistencia.name, resumen_asistencia.name)
+            self.insertadas += len(filas)
+            self.asistencias += len(nuevas)
+            self.lotes += 1
+
+        avance = offset - self._checkpoint[1]
+        self._guardar_checkpoint(segmento, offset)
+        with self._lock:
+            self._bytes_pendientes -= avance
+        return len(filas)
+
+    def _ciclo_drenado(self):
+        try:
+            self._drenar_huerfanos()
+        except Exception:
+            logger.exception("No se pudieron drenar los spools huérfanos; se reintenta al volver a arrancar")
+        espera = self.intervalo
+        while not self._detener.is_set():
+            self._hay_datos.wait(espera)
+            self._hay_datos.clear()
+            try:
+                # Mientras haya lotes completos o segmentos viejos por terminar se sigue sin esperar
+                while not self._detener.is_set():
+                    guardadas = self.drenar()
+                    if guardadas < self.tamano_lote and not (guardadas and self._checkpoint[0] < self._segmento):
+                        break
+                espera = self.intervalo
+            except Exception:
+                # También errores de disco (checkpoint sin espacio): el hilo no debe morir en silencio
+                self.errores += 1
+                espera = min(max(espera * 2, 1.0), ESPERA_MAXIMA)
+                logger.exception("No se pudo drenar el spool RFID, reintento en %.1f s", espera)
+
+    # --- Huérfanos ---
+
+    def _huerfanos(self):
+        """Subdirectorios de `base` sin proceso dueño, más `base` misma si tiene segmentos del formato anterior."""
+        candidatos = [p for p in sorted(self.base.iterdir()) if p.is_dir() and p != self.directorio]
+        if any(self.base.glob("lecturas-*.log")):
+            candidatos.append(self.base)
+        return candidatos
+
+    def _drenar_huerfanos(self):
+        for directorio in self._huerfanos():
+            fd = _bloquear(directorio)
+            if fd is None:
+                continue  # Su proceso sigue vivo
+            try:
+                self._drenar_directorio(directorio)
+            finally:
+                os.close(fd)
+
+    def _drenar_directorio(self, directorio):
+        """Pasa a la base todo lo de un spool sin escritor y lo borra."""
+        huerfano = SpoolLecturas(self.base, tamano_lote=self.tamano_lote)
+        huerfano.directorio = directorio
+        huerfano._checkpoint = huerfano._leer_checkpoint()
+        segmentos = huerfano._segmentos()
+        # Nadie escribe ahí: todos los segmentos cuentan como viejos y se borran al terminarlos
+        huerfano._segmento = (segmentos[-1] + 1) if segmentos else huerfano._checkpoint[0]
+        while not self._detener.is_set():
+            antes = huerfano._checkpoint
+            huerfano.drenar()
+            if huerfano._checkpoint == antes:
+                break
+        else:
+            return  # Se apagó a medias; el checkpoint deja listo el siguiente intento
+        self.insertadas += huerfano.insertadas
+        self.asistencias += huerfano.asistencias
+        self.descartadas_corruptas += huerfano.descartadas_corruptas
+        self.huerfanos_drenados += 1
+        logger.info("Spool huérfano drenado", extra={"directorio": directorio.name, "lecturas": huerfano.insertadas})
+        if directorio == self.base:
+            for ruta in directorio.glob("lecturas-*.log"):
+                ruta.unlink()
+            (directorio / "checkpoint.json").unlink(missing_ok=True)
+        else:
+            shutil.rmtree(directorio)
+
+    # --- Ciclo de vida ---
+
+    def _tomar_directorio(self):
+        """Adopta un subdirectorio huérfano o crea uno nuevo, y se queda con su candado."""
+        self.base.mkdir(parents=True, exist_ok=True)
+        for directorio in sorted(self.base.iterdir()):
+            if directorio.is_dir():
+                fd = _bloquear(directorio)
+                if fd is not None:
+                    return directorio, fd
+        while True:
+            directorio = Path(tempfile.mkdtemp(prefix="proceso-", dir=self.base))
+            fd = _bloquear(directorio)
+            # Otro proceso pudo adoptarlo entre mkdtemp y el flock; entonces se crea otro
+            if fd is not None:
+                return directorio, fd
+
+    def iniciar(self):
+        if self._hilos:
+            return
+        self.directorio, self._fd_candado = self._tomar_directorio()
+        self._checkpoint = self._leer_checkpoint()
+
+        # Siempre se escribe en un segmento nuevo: el último pudo quedar truncado
+        segmentos = self._segmentos()
+        self._abrir_segmento((segmentos[-1] + 1) if segmentos else max(self._checkpoint[0], 1))
+        if not segmentos:
+            self._guardar_checkpoint(self._segmento, 0)
+        self._bytes_pendientes = sum(
+            self._ruta(s).stat().st_size for s in segmentos if s >= self._checkpoint[0]
+        ) - self._checkpoint[1]
+
+        self._detener.clear()
+        self._hilos = [
+            threading.Thread(target=self._ciclo_fsync, name="spool-fsync", daemon=True),
+            threading.Thread(target=self._ciclo_drenado, name="spool-drenado", daemon=True),
+        ]
+        for hilo in self._hilos:
+            hilo.start()
+
+    def detener(self):
+        if not self._hilos:
+            return
+        self._detener.set()
+        self._hay_datos.set()
+        for hilo in self._hilos:
+            hilo.join()
+        self._hilos = []
+        self._sincronizar()
+        # Último intento de pasar lo pendiente; lo que no entre se queda en disco
+        try:
+            while self.drenar():
+                pass
+        except Exception:
+            logger.exception("Quedan lecturas en el spool; se drenarán al volver a arrancar")
+        os.close(self._fd)
+        self._fd = None
+        if self._bytes_pendientes <= 0:
+            # Todo quedó en la base: nada que adoptar en el siguiente arranque
+            shutil.rmtree(self.directorio, ignore_errors=True)
+        os.close(self._fd_candado)
+        self._fd_candado = None
+
+    def metricas(self):
+        return {
+            "directorio": self.directorio.name if self.directorio else None,
+            "pendientes_bytes": self._bytes_pendientes,
+            "segmento": self._segmento,
+            "checkpoint_segmento": self._checkpoint[0],
+            "checkpoint_offset": self._checkpoint[1],
+            "recibidas": self.recibidas,
+            "rechazadas": self.rechazadas,
+            "insertadas": self.insertadas,
+            "asistencias": self.asistencias,
+            "lotes": self.lotes,
+            "errores": self.errores,
+            "fsyncs": self.fsyncs,
+            "descartadas_corruptas": self.descartadas_corruptas,
+            "huerfanos_drenados": self.huerfanos_drenados,
+        }
+
+
+def guardar_lecturas(conn, lote):
+    """Inserta las lecturas y las asistencias nuevas que generan. Regresa estas últimas."""
+    # executemany: el driver lo convierte en INSERT ... VALUES (...), (...)
+    conn.execute(lectura_rfid.insert(), lote)
+    nuevas, reemplazadas = _asistencias_nuevas(conn, lote)
+    if reemplazadas:
+        claves = [(r["matricula"], r["fecha"], r["claveM"], r["hora"]) for r in reemplazadas]
+        conn.execute(
+            delete(asistencia)
+            .where(tuple_(asistencia.c.matricula, asistencia.c.fecha, asistencia.c.claveM, asistencia.c.hora).in_(claves))
+            .where(asistencia.c.fecha.in_({c[1] for c in claves}))
+        )
+    if nuevas:
+        conn.execute(asistencia.insert(), nuevas)
+        # Misma transacción: el resumen nunca queda adelantado ni atrasado
+        conn.execute(sentencia_resumen(conn.dialect.name), deltas_resumen(nuevas, reemplazadas))
+    return nuevas
+
+
+def _asistencias_nuevas(conn, lote):
+    """Filas de ASISTENCIA para las lecturas con alumno y sesión reconocidos.
+
+    Solo cuenta la primera lectura de cada alumno por sesión; las sesiones que
+    ya tienen registro (de otro lote o del pase manual) no se tocan, salvo el
+    `ausente` que puso el cierre de sesión: una lectura que llega tarde al
+    spool lo reemplaza. Regresa (nuevas, reemplazadas).
+    """
+    candidatas = {}
+    for fila in lote:
+        if fila["matricula"] is None or fila["claveM"] is None:
+            continue
+        momento = fila["momento"]
+        clave = (fila["matricula"], momento.date(), fila["claveM"], fila["sesion"])
+        if clave not in candidatas or momento < candidatas[clave]["registrado"]:
+            candidatas[clave] = {
+                "matricula": fila["matricula"],
+                "claveM": fila["claveM"],
+                "fecha": momento.date(),
+                "hora": fila["sesion"],
+                "estado": indice_horario.estado(fila["sesion"], momento),
+                "origen": "rfid",
+                "registrado": momento,
+            }
+    if not candidatas:
+        return [], []
+
+    sesiones = {(c[2], c[1], c[3]) for c in candidatas}
+    existentes = conn.execute(
+        select(
+            asistencia.c.matricula, asistencia.c.fecha, asistencia.c.claveM, asistencia.c.hora,
+            asistencia.c.estado, asistencia.c.origen,
+        )
+        .where(tuple_(asistencia.c.claveM, asistencia.c.fecha, asistencia.c.hora).in_(sesiones))
+        # MySQL no poda particiones con un IN de tuplas; con las fechas sueltas sí
+        .where(asistencia.c.fecha.in_({s[1] for s in sesiones}))
+    )
+    reemplazadas = []
+    for fila in existentes:
+        clave = (fila.matricula, fila.fecha, fila.claveM, fila.hora)
+        if clave not in candidatas:
+            continue
+        if fila.origen == ORIGEN_CIERRE:
+            reemplazadas.append(fila._asdict())
+        else:
+            del candidatas[clave]
+    return list(candidatas.values()), reemplazadas
+
+
+spool_lecturas = SpoolLecturas()
@@ -0,0 +1,81 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TTL = int(os.getenv("TOKEN_TTL", str(12 * 3600)))  # segundos
+
+_secreto = os.getenv("SECRET_KEY")
+if not _secreto:
+    # Sin SECRET_KEY los tokens no sobreviven a un reinicio ni se comparten entre workers
+    logger.warning("SECRET_KEY no definida, se usa una clave aleatoria para este proceso")
+    _secreto = secrets.token_hex(32)
+
+# HMAC con la clave ya procesada (ipad/opad); cada firma solo copia este estado
+_mac_base = hmac.new(_secreto.encode(), digestmod=hashlib.sha256)
+
+
+def _b64(datos):
+    return base64.urlsafe_b64encode(datos).rstrip(b"=")
+
+
+def _desde_b64(datos):
+    return base64.urlsafe_b64decode(datos + b"=" * (-len(datos) % 4))
+
+
+def _firma(datos):
+    mac = _mac_base.copy()
+    mac.update(datos)
+    return mac.digest()
+
+
+def crear_token(sub, rol, ttl=TOKEN_TTL):
+    """Token compacto `payload.firma` con la matrícula/claveP (sub) y el rol."""
+    payload = {"sub": str(sub), "rol": rol, "exp": int(time.time()) + ttl}
+    cuerpo = _b64(json.dumps(payload, separators=(",", ":")).encode())
+    return (cuerpo + b"." + _b64(_firma(cuerpo))).decode()
+
+
+def verificar_token(token):
+    """Regresa el payload si la firma es válida y no ha expirado, si no None."""
+    try:
+        cuerpo, firma = token.encode().split(b".")
+        if not hmac.compare_digest(_desde_b64(firma), _firma(cuerpo)):
+            return None
+        payload = json.loads(_desde_b64(cuerpo))
+    except (ValueError, UnicodeError):
+        return None
+    if not isinstance(payload, dict) or payload.get("exp", 0) < time.time():
+        return None
+    return payload
+
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+# Las dependencias son async para no pasar por el threadpool: solo usan CPU
+async def usuario_actual(credenciales: Optional[HTTPAuthorizationCredentials] = Depends(_bearer)):
+    if credenciales is None:
+        raise HTTPException(status_code=401, detail="Falta el token de sesión")
+    payload = verificar_token(credenciales.credentials)
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Token inválido o expirado")
+    return payload
+
+
+def requiere_rol(*roles):
+    async def dependencia(payload=Depends(usuario_actual)):
+        if payload["rol"] not in roles:
+            raise HTTPException(status_code=403, detail="No tienes permiso para esta acción")
+        return payload
+    return dependencia
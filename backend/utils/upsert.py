@@ -0,0 +1,19 @@
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+
+def sentencia_upsert(dialecto, tabla, claves, valores):
+    """INSERT que actualiza el renglón si la llave ya existe, según el motor.
+
+    `claves` son las columnas de la llave primaria o única. `valores` recibe
+    las columnas del renglón que se intentó insertar y regresa el
+    diccionario {columna: expresión} que se aplica al existente.
+    """
+    if dialecto == "mysql":
+        stmt = mysql.insert(tabla)
+        return stmt.on_duplicate_key_update(**valores(stmt.inserted))
+    if dialecto in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialecto == "sqlite" else postgresql).insert(tabla)
+        return stmt.on_conflict_do_update(
+            index_elements=[tabla.c[c] for c in claves], set_=valores(stmt.excluded)
+        )
+    raise NotImplementedError(f"Sin upsert para el motor {dialecto}")